@@ -36,13 +36,12 @@ from contextlib import asynccontextmanager
 import asyncio
 import logging
 from typing import List, Dict, Any
-import json
 from datetime import datetime
 
 # Import routers
 from routers import transactions, receipts, spells, explain
 from db.init_db import init_db
-from services.websocket_manager import WebSocketManager
+from services.websocket_manager import WebSocketManager, encode_message
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -67,6 +66,7 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Shutting down FraudX+ Copilot Backend")
+    await spells.spell_simulator.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -128,7 +128,7 @@ async def websocket_endpoint(websocket: WebSocket):
             logger.info(f"Received WebSocket message: {data}")
             
             # Echo back confirmation
-            await websocket.send_text(json.dumps({
+            await websocket.send_text(encode_message({
                 "type": "confirmation",
                 "message": "Connected to FraudX+ real-time alerts",
                 "timestamp": datetime.utcnow().isoformat()
@@ -5,6 +5,7 @@ from datetime import datetime
 import asyncio
 import random
 import numpy as np
+from typing import Any, Dict, List
 
 from models.pydantic_schemas import SpellRequest, SpellResult, SpellType
 from models.db_models import SpellRun, get_db
@@ -17,6 +18,58 @@ router = APIRouter()
 # Initialize spell simulator
 spell_simulator = SpellSimulator()
 
+def _complete_spell_run(db: Session, db_spell_run: SpellRun, spell_request: SpellRequest,
+                        spell_result: Dict[str, Any], background_tasks: BackgroundTasks) -> SpellResult:
+    """Record a spell's results, queue its WebSocket broadcasts and build the response"""
+    # Update spell run with results
+    db_spell_run.status = "completed"
+    db_spell_run.progress = 100.0
+    db_spell_run.affected_transactions = spell_result.get("affected_transactions", 0)
+    db_spell_run.flagged_transactions = spell_result.get("flagged_transactions", 0)
+    db_spell_run.total_impact = spell_result.get("total_impact", 0.0)
+    db_spell_run.results = spell_result
+    db_spell_run.completed_at = datetime.utcnow()
+    db_spell_run.duration_seconds = (
+        db_spell_run.completed_at - db_spell_run.started_at
+    ).total_seconds()
+    
+    db.commit()
+    
+    # Broadcast spell results via WebSocket
+    websocket_data = {
+        "type": "spell_completed",
+        "run_id": db_spell_run.run_id,
+        "spell_name": spell_request.spell_name.value,
+        "results": spell_result,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    background_tasks.add_task(websocket_manager.broadcast_spell_result, websocket_data)
+    
+    # Generate fraud alerts for flagged transactions
+    if spell_result.get("flagged_transactions", 0) > 0:
+        alert_data = {
+            "type": "spell_alert",
+            "spell_name": spell_request.spell_name.value,
+            "flagged_count": spell_result.get("flagged_transactions"),
+            "severity": "critical" if spell_result.get("flagged_transactions", 0) > 10 else "high",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        background_tasks.add_task(websocket_manager.broadcast_alert, alert_data)
+    
+    return SpellResult(
+        run_id=db_spell_run.run_id,
+        spell_name=db_spell_run.spell_name,
+        status=db_spell_run.status,
+        progress=db_spell_run.progress,
+        affected_transactions=db_spell_run.affected_transactions,
+        flagged_transactions=db_spell_run.flagged_transactions,
+        total_impact=db_spell_run.total_impact,
+        results=db_spell_run.results,
+        started_at=db_spell_run.started_at,
+        completed_at=db_spell_run.completed_at,
+        duration_seconds=db_spell_run.duration_seconds
+    )
+
 @router.post("/run_spell", response_model=SpellResult)
 async def run_spell(
     spell_request: SpellRequest,
@@ -48,54 +101,7 @@ async def run_spell(
             spell_request.parameters
         )
         
-        # Update spell run with results
-        db_spell_run.status = "completed"
-        db_spell_run.progress = 100.0
-        db_spell_run.affected_transactions = spell_result.get("affected_transactions", 0)
-        db_spell_run.flagged_transactions = spell_result.get("flagged_transactions", 0)
-        db_spell_run.total_impact = spell_result.get("total_impact", 0.0)
-        db_spell_run.results = spell_result
-        db_spell_run.completed_at = datetime.utcnow()
-        db_spell_run.duration_seconds = (
-            db_spell_run.completed_at - db_spell_run.started_at
-        ).total_seconds()
-        
-        db.commit()
-        
-        # Broadcast spell results via WebSocket
-        websocket_data = {
-            "type": "spell_completed",
-            "run_id": db_spell_run.run_id,
-            "spell_name": spell_request.spell_name.value,
-            "results": spell_result,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        background_tasks.add_task(websocket_manager.broadcast_spell_result, websocket_data)
-        
-        # Generate fraud alerts for flagged transactions
-        if spell_result.get("flagged_transactions", 0) > 0:
-            alert_data = {
-                "type": "spell_alert",
-                "spell_name": spell_request.spell_name.value,
-                "flagged_count": spell_result.get("flagged_transactions"),
-                "severity": "critical" if spell_result.get("flagged_transactions", 0) > 10 else "high",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-            background_tasks.add_task(websocket_manager.broadcast_alert, alert_data)
-        
-        return SpellResult(
-            run_id=db_spell_run.run_id,
-            spell_name=db_spell_run.spell_name,
-            status=db_spell_run.status,
-            progress=db_spell_run.progress,
-            affected_transactions=db_spell_run.affected_transactions,
-            flagged_transactions=db_spell_run.flagged_transactions,
-            total_impact=db_spell_run.total_impact,
-            results=db_spell_run.results,
-            started_at=db_spell_run.started_at,
-            completed_at=db_spell_run.completed_at,
-            duration_seconds=db_spell_run.duration_seconds
-        )
+        return _complete_spell_run(db, db_spell_run, spell_request, spell_result, background_tasks)
         
     except Exception as e:
         # Update spell run status to failed
@@ -107,6 +113,59 @@ async def run_spell(
         logger.error(f"❌ Spell execution failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Spell execution failed: {str(e)}")
 
+@router.post("/run_spells", response_model=List[SpellResult])
+async def run_spells(
+    spell_requests: List[SpellRequest],
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Execute independent fraud simulation spells in parallel (e.g. a sweep over all spell types)
+    
+    Each spell runs in its own worker process against a fresh simulation
+    environment, so the spells don't see each other's transactions.
+    """
+    try:
+        # Create spell run records
+        db_spell_runs = [
+            SpellRun(
+                spell_name=spell_request.spell_name.value,
+                spell_type=spell_request.spell_name.value,
+                parameters=spell_request.dict(),
+                status="running"
+            )
+            for spell_request in spell_requests
+        ]
+        
+        db.add_all(db_spell_runs)
+        db.commit()
+        for db_spell_run in db_spell_runs:
+            db.refresh(db_spell_run)
+        
+        logger.info(f"Starting {len(spell_requests)} spells in parallel")
+        
+        # Execute spell simulations
+        spell_results = await spell_simulator.execute_many([
+            (spell_request.spell_name, spell_request.context, spell_request.parameters)
+            for spell_request in spell_requests
+        ])
+        
+        return [
+            _complete_spell_run(db, db_spell_run, spell_request, spell_result, background_tasks)
+            for db_spell_run, spell_request, spell_result in zip(db_spell_runs, spell_requests, spell_results)
+        ]
+        
+    except Exception as e:
+        # Update unfinished spell runs to failed
+        for db_spell_run in locals().get('db_spell_runs', []):
+            if db_spell_run.status == "running":
+                db_spell_run.status = "failed"
+                db_spell_run.results = {"error": str(e)}
+        db.commit()
+        
+        logger.error(f"❌ Spell execution failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Spell execution failed: {str(e)}")
+
 @router.get("/spells/{run_id}", response_model=SpellResult)
 async def get_spell_result(run_id: str, db: Session = Depends(get_db)):
     """Get spell run results by ID"""
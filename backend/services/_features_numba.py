@@ -0,0 +1,110 @@
+"""
+Compiled per-row PaySim feature kernels
+Used by the loader's feature engineering and the prediction feature vector
+"""
+
+import numpy as np
+
+from services._numba_compat import njit
+
+# Serial kernels: they are memory-bound, and a parallel=True kernel starts numba's
+# threading layer, which is not safe to fork (the trainers fork process pools after these run)
+
+@njit(cache=True, fastmath=True)
+def amount_features(amount):
+    """
+    Compute log1p, sqrt and square of the transaction amount in one pass
+
+    Args:
+        amount: float64 amount column
+
+    Returns:
+        Tuple of float32 (amount_log, amount_sqrt, amount_squared)
+    """
+    n = amount.shape[0]
+    amount_log = np.empty(n, dtype=np.float32)
+    amount_sqrt = np.empty(n, dtype=np.float32)
+    amount_squared = np.empty(n, dtype=np.float32)
+
+    for i in range(n):
+        a = amount[i]
+        amount_log[i] = np.log1p(a)
+        amount_sqrt[i] = np.sqrt(a)
+        amount_squared[i] = a * a
+
+    return amount_log, amount_sqrt, amount_squared
+
+@njit(cache=True)
+def balance_features(amount, old_orig, new_orig, old_dest, new_dest):
+    """
+    Compute the per-row balance features in one pass
+
+    Inputs must be the float64 columns (see PAYSIM_DTYPES): the inconsistency
+    checks have a 1-cent tolerance, which float32 can't resolve on large balances.
+    (No fastmath here, it would reassociate them.)
+
+    Args:
+        amount: float64 amount column
+        old_orig, new_orig: float64 sender balances before/after
+        old_dest, new_dest: float64 recipient balances before/after
+
+    Returns:
+        Tuple of (change_orig, change_dest, ratio_orig, ratio_dest) as float32 and
+        (inconsistent_orig, inconsistent_dest, zero_orig, zero_dest, zero_new_orig,
+        zero_new_dest) as int8 flags
+    """
+    n = amount.shape[0]
+    change_orig = np.empty(n, dtype=np.float32)
+    change_dest = np.empty(n, dtype=np.float32)
+    ratio_orig = np.empty(n, dtype=np.float32)
+    ratio_dest = np.empty(n, dtype=np.float32)
+    inconsistent_orig = np.empty(n, dtype=np.int8)
+    inconsistent_dest = np.empty(n, dtype=np.int8)
+    zero_orig = np.empty(n, dtype=np.int8)
+    zero_dest = np.empty(n, dtype=np.int8)
+    zero_new_orig = np.empty(n, dtype=np.int8)
+    zero_new_dest = np.empty(n, dtype=np.int8)
+
+    for i in range(n):
+        a = amount[i]
+        oo, no = old_orig[i], new_orig[i]
+        od, nd = old_dest[i], new_dest[i]
+
+        change_orig[i] = no - oo
+        change_dest[i] = nd - od
+        ratio_orig[i] = a / (oo + 1.0)
+        ratio_dest[i] = a / (od + 1.0)
+
+        inconsistent_orig[i] = abs(no - oo + a) > 0.01
+        inconsistent_dest[i] = abs(nd - od - a) > 0.01
+
+        zero_orig[i] = oo == 0
+        zero_dest[i] = od == 0
+        zero_new_orig[i] = no == 0
+        zero_new_dest[i] = nd == 0
+
+    return (change_orig, change_dest, ratio_orig, ratio_dest,
+            inconsistent_orig, inconsistent_dest,
+            zero_orig, zero_dest, zero_new_orig, zero_new_dest)
+
+@njit(cache=True, fastmath=True)
+def prediction_features(raw, amount_col):
+    """
+    Build the prediction feature matrix: the raw columns plus log1p(amount)
+
+    Args:
+        raw: float64 (n, k) matrix of raw PaySim columns
+        amount_col: Index of the amount column in raw
+
+    Returns:
+        float64 (n, k + 1) feature matrix
+    """
+    n, k = raw.shape
+    out = np.empty((n, k + 1), dtype=np.float64)
+
+    for i in range(n):
+        for j in range(k):
+            out[i, j] = raw[i, j]
+        out[i, k] = np.log1p(raw[i, amount_col])
+
+    return out
@@ -7,18 +7,22 @@ Includes ensemble methods, deep learning, and interpretable ML models.
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Tuple, Optional, Union
+from typing import AbstractSet, Dict, List, Any, Tuple, Optional, Union
 import logging
 from pathlib import Path
 import joblib
 import json
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 # ML Libraries
 from sklearn.ensemble import IsolationForest, RandomForestClassifier
 from sklearn.neighbors import LocalOutlierFactor
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import OneClassSVM
+from sklearn.linear_model import LogisticRegression, SGDOneClassSVM
+from sklearn.kernel_approximation import Nystroem
+from sklearn.pipeline import make_pipeline
 from sklearn.metrics import (
     classification_report, confusion_matrix, roc_auc_score, 
     precision_recall_curve, average_precision_score, roc_curve
@@ -31,7 +35,7 @@ from sklearn.inspection import permutation_importance
 import shap
 
 # Custom imports
-from paysim_loader import PaySimLoader, load_paysim_for_training
+from paysim_loader import PaySimLoader, load_paysim_for_training, release_memmaps
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -39,6 +43,44 @@ from models.pydantic_schemas import TransactionCreate, AnomalyFactors
 
 logger = logging.getLogger(__name__)
 
+# LOF's neighbour search is superlinear; fit it on at most this many rows
+LOF_MAX_FIT_SAMPLES = 50_000
+
+def _fit_single(model_name: str, model_config: Dict[str, Any],
+                X: Union[np.ndarray, str], y: np.ndarray) -> Any:
+    """
+    Fit one ensemble member (module level so worker processes can unpickle it)
+    
+    Args:
+        model_name: Name of the member, for error messages
+        model_config: Entry from PaySimAnomalyDetector._get_models_config
+        X: Training features, or the path of a .npy file to memory-map
+        y: Training labels
+        
+    Returns:
+        The fitted model
+    """
+    if isinstance(X, str):
+        X = np.load(X, mmap_mode='r')
+    
+    model = model_config['model']
+    model_type = model_config['type']
+    
+    if model_type == 'unsupervised':
+        # Unsupervised models (anomaly detection)
+        max_fit = model_config.get('max_fit_samples')
+        if max_fit and len(X) > max_fit:
+            fit_idx = np.random.default_rng(42).choice(len(X), max_fit, replace=False)
+            model.fit(X[fit_idx])
+        else:
+            model.fit(X)
+    elif model_type == 'supervised':
+        model.fit(X, y)
+    else:
+        raise ValueError(f"Unknown model type for {model_name}: {model_type}")
+    
+    return model
+
 class PaySimAnomalyDetector:
     """
     Advanced anomaly detection system trained on PaySim dataset
@@ -51,9 +93,14 @@ class PaySimAnomalyDetector:
     - Model interpretability
     """
     
-    def __init__(self, model_dir: str = "backend/models/paysim"):
+    def __init__(self, model_dir: str = "backend/models/paysim", n_jobs: int = -1,
+                 xgb_params: Optional[Dict[str, Any]] = None,
+                 enabled_models: Optional[AbstractSet[str]] = None):
         self.model_dir = Path(model_dir)
         self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.n_jobs = n_jobs
+        self.xgb_params = xgb_params or {}
+        self.enabled_models = enabled_models
         
         # Models
         self.models = {}
@@ -72,7 +119,9 @@ class PaySimAnomalyDetector:
     
     def train_models(self, sample_size: int = 200000, 
                     balance_data: bool = True,
-                    save_models: bool = True) -> Dict[str, Any]:
+                    save_models: bool = True,
+                    data: Optional[pd.DataFrame] = None,
+                    max_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Train all fraud detection models on PaySim data
         
@@ -80,6 +129,9 @@ class PaySimAnomalyDetector:
             sample_size: Number of samples to use for training
             balance_data: Whether to balance fraud/non-fraud samples
             save_models: Whether to save trained models
+            data: Preloaded PaySim frame to sample from instead of reading the CSV
+            max_workers: Processes fitting ensemble members concurrently (None: one per
+                member up to the CPU count, or 1 when n_jobs is capped; 1: fit in this process)
             
         Returns:
             Training results and metrics
@@ -91,7 +143,9 @@ class PaySimAnomalyDetector:
         # Load and prepare data
         data_splits, metadata = load_paysim_for_training(
             sample_size=sample_size,
-            balance_data=balance_data
+            balance_data=balance_data,
+            cache_dir=self.model_dir / "splits",
+            df=data
         )
         
         self.metadata = metadata
@@ -111,18 +165,19 @@ class PaySimAnomalyDetector:
         
         logger.info("🏗️ Training individual models...")
         
-        # Train each model
-        for model_name, model_config in models_config.items():
-            logger.info(f"   Training {model_name}...")
-            
-            model = model_config['model']
-            model_type = model_config['type']
+        # Fit the members concurrently, then score them here in config order
+        try:
+            fitted = self._fit_models(models_config, X_train, y_train, max_workers)
+        finally:
+            # Fitting is done with the split files, whether pool workers reopened them by
+            # path or the members were fitted here; the maps still held here stay usable
+            release_memmaps(data_splits)
+        
+        for model_name, model in fitted.items():
+            model_type = models_config[model_name]['type']
             
             try:
                 if model_type == 'unsupervised':
-                    # Unsupervised models (anomaly detection)
-                    model.fit(X_train)
-                    
                     # Get anomaly scores
                     train_scores = model.decision_function(X_train)
                     val_scores = model.decision_function(X_val)
@@ -134,9 +189,6 @@ class PaySimAnomalyDetector:
                     test_probs = self._convert_anomaly_scores(test_scores, model_name)
                     
                 elif model_type == 'supervised':
-                    # Supervised models
-                    model.fit(X_train, y_train)
-                    
                     # Get probability predictions
                     train_probs = model.predict_proba(X_train)[:, 1]
                     val_probs = model.predict_proba(X_val)[:, 1]
@@ -161,7 +213,7 @@ class PaySimAnomalyDetector:
                 logger.info(f"   ✅ {model_name}: Val AUC={val_auc:.4f}, Test AUC={test_auc:.4f}")
                 
             except Exception as e:
-                logger.error(f"   ❌ Failed to train {model_name}: {e}")
+                logger.error(f"   ❌ Failed to evaluate {model_name}: {e}")
                 continue
         
         # Calculate ensemble weights based on validation AUC
@@ -205,16 +257,86 @@ class PaySimAnomalyDetector:
         
         return training_results
     
+    def _fit_models(self, models_config: Dict[str, Dict], X_train: np.ndarray,
+                    y_train: np.ndarray, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fit every configured model, one process per member
+        
+        Workers memory-map X_train from its .npy file instead of receiving a
+        pickled copy per job. The CPU budget (n_jobs, or all cores for -1) is
+        split between the concurrent members.
+        
+        Args:
+            models_config: Output of _get_models_config
+            X_train: Training features (ideally prepare_ml_data's memory map)
+            y_train: Training labels
+            max_workers: Worker processes (see train_models)
+            
+        Returns:
+            Fitted models by name, in config order; members that failed are left out
+        """
+        cpu_budget = (os.cpu_count() or 1) if self.n_jobs < 0 else self.n_jobs
+        
+        if max_workers is None:
+            # A caller that capped n_jobs (e.g. a sweep worker) has already shared
+            # the CPUs out; a pool of its own would only oversubscribe them
+            max_workers = 1 if self.n_jobs > 0 else min(len(models_config), cpu_budget)
+        
+        if max_workers <= 1:
+            fitted = {}
+            for model_name, model_config in models_config.items():
+                logger.info(f"   Training {model_name}...")
+                try:
+                    fitted[model_name] = _fit_single(model_name, model_config, X_train, y_train)
+                except Exception as e:
+                    logger.error(f"   ❌ Failed to train {model_name}: {e}")
+            return fitted
+        
+        member_jobs = max(1, cpu_budget // max_workers)
+        for model_config in models_config.values():
+            model = model_config['model']
+            if 'n_jobs' in model.get_params(deep=False):
+                model.set_params(n_jobs=member_jobs)
+        
+        with tempfile.TemporaryDirectory(prefix="paysim_fit_") as tmp:
+            if isinstance(X_train, np.memmap):
+                # Already spilled by prepare_ml_data; workers map the same file
+                X_path = X_train.filename
+            else:
+                X_path = os.path.join(tmp, "X_train.npy")
+                np.save(X_path, X_train)
+            
+            # Spawned rather than forked workers: a fork taken after an earlier
+            # train_models call in this process inherits OpenMP/BLAS thread pools
+            # in an undefined state and can deadlock in the first fit
+            spawn = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=spawn) as pool:
+                futures = {
+                    name: pool.submit(_fit_single, name, model_config, X_path, y_train)
+                    for name, model_config in models_config.items()
+                }
+                logger.info(f"   Training {len(futures)} models across {max_workers} processes "
+                            f"({member_jobs} threads each)...")
+                
+                fitted = {}
+                for model_name, future in futures.items():
+                    try:
+                        fitted[model_name] = future.result()
+                    except Exception as e:
+                        logger.error(f"   ❌ Failed to train {model_name}: {e}")
+        
+        return fitted
+    
     def _get_models_config(self) -> Dict[str, Dict]:
-        """Get configuration for all models"""
-        return {
+        """Get configuration for the enabled models"""
+        models_config = {
             'isolation_forest': {
                 'model': IsolationForest(
                     contamination=0.1,
                     n_estimators=200,
                     max_samples='auto',
                     random_state=42,
-                    n_jobs=-1
+                    n_jobs=self.n_jobs
                 ),
                 'type': 'unsupervised'
             },
@@ -223,29 +345,32 @@ class PaySimAnomalyDetector:
                     n_neighbors=20,
                     contamination=0.1,
                     novelty=True,
-                    n_jobs=-1
+                    n_jobs=self.n_jobs
                 ),
-                'type': 'unsupervised'
+                'type': 'unsupervised',
+                'max_fit_samples': LOF_MAX_FIT_SAMPLES
             },
             'one_class_svm': {
-                'model': OneClassSVM(
-                    kernel='rbf',
-                    gamma='scale',
-                    nu=0.1
+                # Linear-time approximation of the RBF OneClassSVM
+                'model': make_pipeline(
+                    Nystroem(kernel='rbf', n_components=300, random_state=42),
+                    SGDOneClassSVM(nu=0.1, random_state=42)
                 ),
                 'type': 'unsupervised'
             },
             'xgboost': {
-                'model': xgb.XGBClassifier(
-                    n_estimators=200,
-                    max_depth=6,
-                    learning_rate=0.1,
-                    subsample=0.8,
-                    colsample_bytree=0.8,
-                    random_state=42,
-                    eval_metric='logloss',
-                    use_label_encoder=False
-                ),
+                'model': xgb.XGBClassifier(**{
+                    'n_estimators': 200,
+                    'max_depth': 6,
+                    'learning_rate': 0.1,
+                    'subsample': 0.8,
+                    'colsample_bytree': 0.8,
+                    'random_state': 42,
+                    'n_jobs': self.n_jobs,
+                    'eval_metric': 'logloss',
+                    'use_label_encoder': False,
+                    **self.xgb_params
+                }),
                 'type': 'supervised'
             },
             'random_forest': {
@@ -255,7 +380,7 @@ class PaySimAnomalyDetector:
                     min_samples_split=5,
                     min_samples_leaf=2,
                     random_state=42,
-                    n_jobs=-1,
+                    n_jobs=self.n_jobs,
                     class_weight='balanced'
                 ),
                 'type': 'supervised'
@@ -270,6 +395,10 @@ class PaySimAnomalyDetector:
                 'type': 'supervised'
             }
         }
+        
+        if self.enabled_models is None:
+            return models_config
+        return {name: cfg for name, cfg in models_config.items() if name in self.enabled_models}
     
     def _convert_anomaly_scores(self, scores: np.ndarray, model_name: str) -> np.ndarray:
         """Convert anomaly scores to probabilities"""
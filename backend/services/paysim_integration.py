@@ -6,42 +6,97 @@ Integrates PaySim dataset with existing anomaly detection API
 import logging
 import os
 import sys
-from typing import Dict, List, Any, Optional
+from typing import AbstractSet, Dict, List, Any, Optional
 import numpy as np
 import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from services.paysim_loader import PaySimLoader, load_paysim_for_training
+from services.paysim_loader import (PaySimLoader, load_paysim_for_training, iter_paysim_batches,
+                                    DEFAULT_DATASET_PATH)
 from services.enhanced_anomaly_model import PaySimAnomalyDetector
+from services._features_numba import prediction_features
 from models.pydantic_schemas import TransactionCreate, AnomalyFactors
 
 logger = logging.getLogger(__name__)
 
+# Raw PaySim columns of the prediction feature vector (log1p(amount) is appended)
+PREDICTION_COLUMNS = [
+    'step', 'amount', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'isFlaggedFraud'
+]
+
+# Rows per Parquet batch fed to the streaming model
+STREAM_BATCH_SIZE = 100_000
+
 class PaySimFraudDetector:
     """
     PaySim-powered fraud detector for FraudX+ Copilot
     Integrates real-world transaction patterns with existing API
     """
     
-    def __init__(self, model_sample_size: int = 50000):
+    def __init__(self, model_sample_size: int = 50000, data: Optional[pd.DataFrame] = None,
+                 n_jobs: int = -1, xgb_params: Optional[Dict[str, Any]] = None,
+                 enabled_models: Optional[AbstractSet[str]] = None):
         """
         Initialize PaySim fraud detector
         
         Args:
             model_sample_size: Size of PaySim sample to train on
+            data: Preloaded PaySim frame to train from (None reads the Parquet snapshot)
+            n_jobs: Threads each model may use (-1 for all cores)
+            xgb_params: Overrides for the XGBoost ensemble member (e.g. tree_method, device)
+            enabled_models: Ensemble members to train (None trains all of them)
         """
         self.model_sample_size = model_sample_size
+        self.data = data
+        self.n_jobs = n_jobs
+        self.xgb_params = xgb_params or {}
+        self.enabled_models = enabled_models
         self.detector: Optional[PaySimAnomalyDetector] = None
+        
+        # Incrementally trained model over the prediction features (see partial_fit)
+        self.stream_scaler: Optional[StandardScaler] = None
+        self.stream_model: Optional[SGDClassifier] = None
+        self.stream_rows = 0
+        
         self.is_trained = False
         
         logger.info(f"🎯 PaySim Fraud Detector initialized (sample size: {model_sample_size:,})")
     
-    def train_models(self) -> Dict[str, Any]:
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, model_sample_size: Optional[int] = None,
+                       n_jobs: int = -1, xgb_params: Optional[Dict[str, Any]] = None,
+                       enabled_models: Optional[AbstractSet[str]] = None) -> "PaySimFraudDetector":
+        """
+        Create a detector that trains on an already-loaded PaySim frame
+        
+        Args:
+            df: Raw PaySim DataFrame (see paysim_loader.read_paysim)
+            model_sample_size: Rows to sample from df (defaults to all of them)
+            n_jobs: Threads each model may use (-1 for all cores)
+            xgb_params: Overrides for the XGBoost ensemble member (e.g. tree_method, device)
+            enabled_models: Ensemble members to train (None trains all of them)
+            
+        Returns:
+            Untrained PaySimFraudDetector bound to df
+        """
+        return cls(model_sample_size=model_sample_size or len(df), data=df, n_jobs=n_jobs,
+                   xgb_params=xgb_params, enabled_models=enabled_models)
+    
+    def train_models(self, save_models: bool = True) -> Dict[str, Any]:
         """
         Train PaySim models and return performance metrics
         
+        Without a preloaded frame, the first training run converts the CSV to
+        its Parquet snapshot (see paysim_loader.read_paysim); later runs reuse it.
+        
+        Args:
+            save_models: Whether to persist the trained models to disk
+        
         Returns:
             Dictionary with training results and performance metrics
         """
@@ -49,12 +104,15 @@ class PaySimFraudDetector:
             logger.info("🚀 Starting PaySim model training...")
             
             # Initialize detector
-            self.detector = PaySimAnomalyDetector()
+            self.detector = PaySimAnomalyDetector(n_jobs=self.n_jobs, xgb_params=self.xgb_params,
+                                                  enabled_models=self.enabled_models)
             
             # Train on PaySim data
             results = self.detector.train_models(
                 sample_size=self.model_sample_size,
-                balance_data=True
+                balance_data=True,
+                save_models=save_models,
+                data=self.data
             )
             
             self.is_trained = True
@@ -66,6 +124,78 @@ class PaySimFraudDetector:
             logger.error(f"❌ PaySim training failed: {str(e)}")
             raise
     
+    def partial_fit(self, batch: pd.DataFrame) -> "PaySimFraudDetector":
+        """
+        Update the streaming model with one batch of raw PaySim rows
+        
+        A logistic-regression SGDClassifier over the prediction features, with an
+        incrementally fitted scaler. Fraud rows are up-weighted by the batch's
+        class ratio, since fraud is ~0.1% of PaySim.
+        
+        Args:
+            batch: Raw PaySim rows including isFraud (see iter_paysim_batches)
+            
+        Returns:
+            self
+        """
+        if self.stream_model is None:
+            self.stream_scaler = StandardScaler()
+            self.stream_model = SGDClassifier(loss='log_loss', random_state=42)
+        
+        features = prediction_features(batch[PREDICTION_COLUMNS].to_numpy(dtype=np.float64),
+                                       PREDICTION_COLUMNS.index('amount'))
+        labels = batch['isFraud'].to_numpy(dtype=np.int8)
+        fraud_count = int(labels.sum())
+        sample_weight = np.where(labels == 1, (len(labels) - fraud_count) / max(fraud_count, 1), 1.0)
+        
+        self.stream_scaler.partial_fit(features)
+        self.stream_model.partial_fit(self.stream_scaler.transform(features), labels,
+                                      classes=np.array([0, 1]), sample_weight=sample_weight)
+        self.stream_rows += len(batch)
+        return self
+    
+    def train_streaming(self, batch_size: int = STREAM_BATCH_SIZE,
+                        dataset_path: str = DEFAULT_DATASET_PATH) -> Dict[str, Any]:
+        """
+        Train the streaming model over the whole dataset, one Parquet batch at a time
+        
+        Args:
+            batch_size: Rows per batch
+            dataset_path: Path to the PaySim CSV (its Parquet snapshot is streamed)
+            
+        Returns:
+            Dictionary with the rows and batches seen
+        """
+        logger.info(f"🚀 Starting streaming PaySim training (batch size: {batch_size:,})...")
+        
+        batches = 0
+        for batch in iter_paysim_batches(dataset_path, batch_size=batch_size,
+                                         columns=PREDICTION_COLUMNS + ['isFraud']):
+            self.partial_fit(batch)
+            batches += 1
+            logger.info(f"📦 Batch {batches}: {self.stream_rows:,} rows trained")
+        
+        logger.info("✅ Streaming PaySim training complete!")
+        return {"rows": self.stream_rows, "batches": batches}
+    
+    def predict_fraud_streaming(self, transactions: List[TransactionCreate]) -> np.ndarray:
+        """
+        Fraud probabilities from the streaming model
+        
+        Args:
+            transactions: Transactions to analyze
+            
+        Returns:
+            Fraud probability per transaction
+        """
+        if self.stream_model is None:
+            raise ValueError("Streaming model not trained. Call train_streaming() first.")
+        
+        frame = pd.DataFrame.from_records([self._convert_to_paysim_format(t) for t in transactions],
+                                          columns=PREDICTION_COLUMNS)
+        features = prediction_features(frame.to_numpy(dtype=np.float64), PREDICTION_COLUMNS.index('amount'))
+        return self.stream_model.predict_proba(self.stream_scaler.transform(features))[:, 1]
+    
     def predict_fraud(self, transaction: TransactionCreate) -> Dict[str, Any]:
         """
         Predict fraud probability for a transaction using PaySim models
@@ -83,25 +213,7 @@ class PaySimFraudDetector:
             # Convert transaction to PaySim format
             transaction_data = self._convert_to_paysim_format(transaction)
             
-            # Convert to DataFrame and engineer features
-            transaction_df = pd.DataFrame([transaction_data])
-            
-            # Use the loader to engineer features (reuse the trained loader)
-            # For now, create a simplified feature vector
-            features = np.array([[
-                transaction_data['step'],
-                transaction_data['amount'],
-                transaction_data['oldbalanceOrg'],
-                transaction_data['newbalanceOrig'],
-                transaction_data['oldbalanceDest'],
-                transaction_data['newbalanceDest'],
-                transaction_data['isFlaggedFraud'],
-                np.log1p(transaction_data['amount'])  # Basic feature engineering
-            ]])
-            
-            # Scale features using stored scaler
-            if hasattr(self.detector, 'scaler') and self.detector.scaler is not None:
-                features = self.detector.scaler.transform(features)
+            features = self._feature_matrix([transaction_data])
             
             # Get predictions
             predictions = self.detector.predict(features, return_individual=True)
@@ -120,6 +232,67 @@ class PaySimFraudDetector:
             logger.error(f"❌ Prediction failed: {str(e)}")
             raise
     
+    def predict_fraud_batch(self, transactions: List[TransactionCreate]) -> List[Dict[str, Any]]:
+        """
+        Predict fraud probability for many transactions with one ensemble pass
+        
+        Args:
+            transactions: Transactions to analyze
+            
+        Returns:
+            Fraud predictions in the same order as transactions
+        """
+        if not self.is_trained or self.detector is None:
+            raise ValueError("Models not trained. Call train_models() first.")
+        
+        if not transactions:
+            return []
+        
+        try:
+            paysim_rows = [self._convert_to_paysim_format(t) for t in transactions]
+            features = self._feature_matrix(paysim_rows)
+            
+            # Every model sees the whole batch once
+            predictions = self.detector.predict(features, return_individual=True)
+            ensemble_scores = predictions['ensemble']
+            individual = predictions['individual']
+            
+            return [
+                {
+                    'fraud_probability': float(score),
+                    'is_fraudulent': score > 0.5,
+                    'confidence': float(abs(score - 0.5) * 2),
+                    'individual_models': {k: v[i] for k, v in individual.items()},
+                    'transaction_data': row
+                }
+                for i, (score, row) in enumerate(zip(ensemble_scores, paysim_rows))
+            ]
+            
+        except Exception as e:
+            logger.error(f"❌ Batch prediction failed: {str(e)}")
+            raise
+    
+    def _feature_matrix(self, paysim_rows: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Build the scaled model input for PaySim-format rows
+        
+        Args:
+            paysim_rows: Transactions from _convert_to_paysim_format
+            
+        Returns:
+            Feature matrix with one row per transaction
+        """
+        # Simplified feature vector, built column-wise for the whole batch
+        frame = pd.DataFrame.from_records(paysim_rows, columns=PREDICTION_COLUMNS)
+        features = prediction_features(frame.to_numpy(dtype=np.float64),
+                                       PREDICTION_COLUMNS.index('amount'))
+        
+        # Scale features using stored scaler
+        if hasattr(self.detector, 'scaler') and self.detector.scaler is not None:
+            features = self.detector.scaler.transform(features)
+        
+        return features
+    
     def _convert_to_paysim_format(self, transaction: TransactionCreate) -> Dict[str, Any]:
         """
         Convert API transaction format to PaySim format
@@ -131,7 +304,7 @@ class PaySimFraudDetector:
             Transaction in PaySim format
         """
         # Determine transaction type based on category or default to PAYMENT
-        transaction_type = self._map_transaction_type(getattr(transaction, 'category', 'payment'))
+        transaction_type = self._map_transaction_type(getattr(transaction, 'category', None) or 'payment')
         
         # Estimate sender balance (if not provided, use amount * 2 as default)
         sender_balance = getattr(transaction, 'sender_balance', transaction.amount * 2)
@@ -18,9 +18,15 @@ Dataset features:
 - isFlaggedFraud: Flags illegal attempts (large transfers >200k)
 """
 
+import os
+import sys
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict, List, Any, Optional
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
+import pyarrow.parquet as pq
+from typing import Tuple, Dict, List, Any, Iterator, Optional, Sequence, Union
 import logging
 from pathlib import Path
 from sklearn.preprocessing import StandardScaler, LabelEncoder
@@ -29,16 +35,60 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services._features_numba import amount_features, balance_features
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_DATASET_PATH = "../dataset/PS_20174392719_1491204439457_log.csv"
+
+# Explicit column types. Amount and balances stay float64: balances run into the
+# millions, where float32 can't hold cents and the balance-consistency features
+# (one-cent tolerance) flip on consistent rows. Only the scaled matrix is downcast.
+PAYSIM_DTYPES = {
+    'step': 'int32',
+    'type': 'category',
+    'amount': 'float64',
+    'nameOrig': 'object',
+    'oldbalanceOrg': 'float64',
+    'newbalanceOrig': 'float64',
+    'nameDest': 'object',
+    'oldbalanceDest': 'float64',
+    'newbalanceDest': 'float64',
+    'isFraud': 'int8',
+    'isFlaggedFraud': 'int8'
+}
+
+# Arrow equivalents of PAYSIM_DTYPES for the one-time CSV -> Parquet conversion
+PAYSIM_ARROW_TYPES = {
+    'step': pa.int32(),
+    'type': pa.dictionary(pa.int32(), pa.string()),
+    'amount': pa.float64(),
+    'nameOrig': pa.string(),
+    'oldbalanceOrg': pa.float64(),
+    'newbalanceOrig': pa.float64(),
+    'nameDest': pa.string(),
+    'oldbalanceDest': pa.float64(),
+    'newbalanceDest': pa.float64(),
+    'isFraud': pa.int8(),
+    'isFlaggedFraud': pa.int8()
+}
+
+# Raw columns the feature helpers read; cached once per frame as NumPy arrays
+CACHED_COLUMNS = (
+    'amount', 'step', 'oldbalanceOrg', 'newbalanceOrig',
+    'oldbalanceDest', 'newbalanceDest', 'nameOrig', 'nameDest', 'isFraud'
+)
+
 class PaySimLoader:
     """
     PaySim dataset loader with advanced feature engineering
     """
     
-    def __init__(self, dataset_path: str = "../dataset/PS_20174392719_1491204439457_log.csv"):
+    def __init__(self, dataset_path: str = DEFAULT_DATASET_PATH):
         self.dataset_path = Path(dataset_path)
         self.df = None
+        self._cols: Dict[str, np.ndarray] = {}
         self.feature_columns = []
         self.target_column = 'isFraud'
         self.scalers = {}
@@ -51,32 +101,33 @@ class PaySimLoader:
         logger.info("🎯 PaySim Loader initialized")
     
     def load_dataset(self, sample_size: Optional[int] = None, 
-                    balance_fraud: bool = True) -> pd.DataFrame:
+                    balance_fraud: bool = True,
+                    df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
         """
         Load PaySim dataset with optional sampling and balancing
         
         Args:
             sample_size: Number of samples to load (None for full dataset)
             balance_fraud: Whether to balance fraud/non-fraud samples
+            df: Preloaded PaySim frame to sample from instead of reading the CSV
             
         Returns:
             Loaded and optionally balanced DataFrame
         """
-        logger.info(f"📂 Loading PaySim dataset from {self.dataset_path}")
-        
         try:
             # Load dataset
-            if sample_size:
-                # Sample random rows for faster development
-                total_rows = sum(1 for _ in open(self.dataset_path)) - 1  # -1 for header
-                skip_rows = sorted(np.random.choice(range(1, total_rows + 1), 
-                                                  total_rows - sample_size, 
-                                                  replace=False))
-                self.df = pd.read_csv(self.dataset_path, skiprows=skip_rows)
-                logger.info(f"📊 Loaded sample of {len(self.df):,} transactions")
+            if df is not None:
+                if sample_size and len(df) > sample_size:
+                    df = df.sample(n=sample_size, random_state=42)
+                self.df = df.reset_index(drop=True)
+                logger.info(f"📊 Using preloaded frame: {len(self.df):,} transactions")
             else:
-                self.df = pd.read_csv(self.dataset_path)
-                logger.info(f"📊 Loaded full dataset: {len(self.df):,} transactions")
+                logger.info(f"📂 Loading PaySim dataset from {self.dataset_path}")
+                self.df = read_paysim(self.dataset_path)
+                if sample_size and len(self.df) > sample_size:
+                    # Sample random rows for faster development
+                    self.df = self.df.sample(n=sample_size, random_state=42).reset_index(drop=True)
+                    logger.info(f"📊 Loaded sample of {len(self.df):,} transactions")
             
             # Basic dataset info
             fraud_count = self.df[self.target_column].sum()
@@ -98,6 +149,8 @@ class PaySimLoader:
                 self.df = self._balance_dataset(self.df)
                 logger.info(f"⚖️ Balanced dataset: {len(self.df):,} transactions")
             
+            self._cols = self._column_views(self.df)
+            
             return self.df
             
         except Exception as e:
@@ -144,28 +197,30 @@ class PaySimLoader:
         """
         if df is None:
             df = self.df.copy()
+            cols = self._cols or self._column_views(df)
         else:
             df = df.copy()
+            cols = self._column_views(df)
         
         logger.info("🔧 Engineering features from PaySim data...")
         
         # 1. Basic transaction features
-        df = self._create_basic_features(df)
+        df = self._create_basic_features(df, cols)
         
         # 2. Balance analysis features
-        df = self._create_balance_features(df)
+        df = self._create_balance_features(df, cols)
         
         # 3. Customer behavior features
-        df = self._create_customer_features(df)
+        df = self._create_customer_features(df, cols)
         
         # 4. Transaction timing features  
-        df = self._create_timing_features(df)
+        df = self._create_timing_features(df, cols)
         
         # 5. Network/relationship features
-        df = self._create_network_features(df)
+        df = self._create_network_features(df, cols)
         
         # 6. Statistical features
-        df = self._create_statistical_features(df)
+        df = self._create_statistical_features(df, cols)
         
         # Store all features (will be filtered later during ML preparation)
         self.feature_columns = [col for col in df.columns if col not in ['nameOrig', 'nameDest', self.target_column]]
@@ -175,13 +230,16 @@ class PaySimLoader:
         
         return df
     
-    def _create_basic_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _column_views(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Convert the raw columns used by feature engineering to NumPy once"""
+        return {col: df[col].to_numpy() for col in CACHED_COLUMNS if col in df.columns}
+    
+    def _create_basic_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create basic transaction features"""
+        amount = cols['amount']
         
         # Transaction amount features
-        df['amount_log'] = np.log1p(df['amount'])
-        df['amount_sqrt'] = np.sqrt(df['amount'])
-        df['amount_squared'] = df['amount'] ** 2
+        df['amount_log'], df['amount_sqrt'], df['amount_squared'] = amount_features(amount)
         
         # Transaction type one-hot encoding (replace original type column)
         type_dummies = pd.get_dummies(df['type'], prefix='type')
@@ -189,38 +247,27 @@ class PaySimLoader:
         df = pd.concat([df, type_dummies], axis=1)
         
         # Amount categories
-        df['amount_category'] = pd.cut(df['amount'], 
+        df['amount_category'] = pd.cut(amount, 
                                      bins=[0, 100, 1000, 10000, 100000, float('inf')],
-                                     labels=[0, 1, 2, 3, 4])  # Use numeric labels
-        df['amount_category'] = df['amount_category'].astype(float)
+                                     labels=[0, 1, 2, 3, 4]).astype(float)  # Use numeric labels
         
         return df
     
-    def _create_balance_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _create_balance_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create balance-related features"""
-        
-        # Balance changes
-        df['balance_change_orig'] = df['newbalanceOrig'] - df['oldbalanceOrg']
-        df['balance_change_dest'] = df['newbalanceDest'] - df['oldbalanceDest']
-        
-        # Balance ratios
-        df['amount_to_balance_orig'] = df['amount'] / (df['oldbalanceOrg'] + 1)
-        df['amount_to_balance_dest'] = df['amount'] / (df['oldbalanceDest'] + 1)
-        
-        # Balance inconsistencies (potential fraud indicators)
-        df['balance_inconsistent_orig'] = (
-            abs(df['balance_change_orig'] + df['amount']) > 0.01
-        ).astype(int)
-        
-        df['balance_inconsistent_dest'] = (
-            abs(df['balance_change_dest'] - df['amount']) > 0.01
-        ).astype(int)
-        
-        # Zero balance flags
-        df['zero_balance_orig'] = (df['oldbalanceOrg'] == 0).astype(int)
-        df['zero_balance_dest'] = (df['oldbalanceDest'] == 0).astype(int)
-        df['zero_newbalance_orig'] = (df['newbalanceOrig'] == 0).astype(int)
-        df['zero_newbalance_dest'] = (df['newbalanceDest'] == 0).astype(int)
+        amount = cols['amount']
+        old_orig, new_orig = cols['oldbalanceOrg'], cols['newbalanceOrig']
+        old_dest, new_dest = cols['oldbalanceDest'], cols['newbalanceDest']
+        
+        # Balance changes, ratios, inconsistencies (potential fraud indicators)
+        # and zero-balance flags, computed in one compiled pass over the rows
+        (df['balance_change_orig'], df['balance_change_dest'],
+         df['amount_to_balance_orig'], df['amount_to_balance_dest'],
+         df['balance_inconsistent_orig'], df['balance_inconsistent_dest'],
+         df['zero_balance_orig'], df['zero_balance_dest'],
+         df['zero_newbalance_orig'], df['zero_newbalance_dest']) = balance_features(
+            amount, old_orig, new_orig, old_dest, new_dest
+        )
         
         # Balance percentiles
         df['balance_orig_pct'] = df['oldbalanceOrg'].rank(pct=True)
@@ -228,7 +275,7 @@ class PaySimLoader:
         
         return df
     
-    def _create_customer_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _create_customer_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create customer behavior features"""
         
         # Customer transaction frequency
@@ -248,33 +295,37 @@ class PaySimLoader:
         df['dest_amount_std'] = df['nameDest'].map(dest_amounts['std']).fillna(0)
         
         # Amount deviation from customer's typical behavior
-        df['amount_deviation_orig'] = abs(df['amount'] - df['orig_amount_mean']) / (df['orig_amount_std'] + 1)
-        df['amount_deviation_dest'] = abs(df['amount'] - df['dest_amount_mean']) / (df['dest_amount_std'] + 1)
+        amount = cols['amount']
+        df['amount_deviation_orig'] = np.abs(amount - df['orig_amount_mean'].to_numpy()) / (df['orig_amount_std'].to_numpy() + 1)
+        df['amount_deviation_dest'] = np.abs(amount - df['dest_amount_mean'].to_numpy()) / (df['dest_amount_std'].to_numpy() + 1)
         
         return df
     
-    def _create_timing_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _create_timing_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create timing-based features"""
+        step = cols['step']
         
         # Time-based features
-        df['hour'] = df['step'] % 24
-        df['day'] = df['step'] // 24
-        df['week'] = df['day'] // 7
+        hour = step % 24
+        day = step // 24
+        df['hour'] = hour
+        df['day'] = day
+        df['week'] = day // 7
         
         # Cyclical time features
-        df['hour_sin'] = np.sin(2 * np.pi * df['hour'] / 24)
-        df['hour_cos'] = np.cos(2 * np.pi * df['hour'] / 24)
-        df['day_sin'] = np.sin(2 * np.pi * df['day'] / 7)
-        df['day_cos'] = np.cos(2 * np.pi * df['day'] / 7)
+        df['hour_sin'] = np.sin(2 * np.pi * hour / 24)
+        df['hour_cos'] = np.cos(2 * np.pi * hour / 24)
+        df['day_sin'] = np.sin(2 * np.pi * day / 7)
+        df['day_cos'] = np.cos(2 * np.pi * day / 7)
         
         # Business hours
-        df['business_hours'] = ((df['hour'] >= 9) & (df['hour'] <= 17)).astype(int)
-        df['weekend'] = (df['day'] % 7 >= 5).astype(int)
-        df['night_time'] = ((df['hour'] >= 22) | (df['hour'] <= 6)).astype(int)
+        df['business_hours'] = ((hour >= 9) & (hour <= 17)).astype(int)
+        df['weekend'] = (day % 7 >= 5).astype(int)
+        df['night_time'] = ((hour >= 22) | (hour <= 6)).astype(int)
         
         return df
     
-    def _create_network_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _create_network_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create network/relationship features"""
         
         # Customer interaction patterns
@@ -294,30 +345,34 @@ class PaySimLoader:
         
         return df
     
-    def _create_statistical_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _create_statistical_features(self, df: pd.DataFrame, cols: Dict[str, np.ndarray]) -> pd.DataFrame:
         """Create statistical features"""
+        amount = cols['amount']
         
         # Amount percentiles and z-scores
         for pct in [25, 50, 75, 90, 95, 99]:
-            percentile_val = np.percentile(df['amount'], pct)
-            df[f'amount_above_p{pct}'] = (df['amount'] > percentile_val).astype(int)
+            percentile_val = np.percentile(amount, pct)
+            df[f'amount_above_p{pct}'] = (amount > percentile_val).astype(int)
         
         # Z-scores
-        amount_mean = df['amount'].mean()
-        amount_std = df['amount'].std()
-        df['amount_zscore'] = (df['amount'] - amount_mean) / amount_std
-        df['amount_zscore_abs'] = abs(df['amount_zscore'])
+        amount_mean = amount.mean()
+        amount_std = amount.std(ddof=1)
+        amount_zscore = (amount - amount_mean) / amount_std
+        amount_zscore_abs = np.abs(amount_zscore)
+        df['amount_zscore'] = amount_zscore
+        df['amount_zscore_abs'] = amount_zscore_abs
         
         # Statistical flags
-        df['amount_extreme'] = (abs(df['amount_zscore']) > 3).astype(int)
-        df['amount_very_high'] = (df['amount_zscore'] > 2).astype(int)
-        df['amount_very_low'] = (df['amount_zscore'] < -2).astype(int)
+        df['amount_extreme'] = (amount_zscore_abs > 3).astype(int)
+        df['amount_very_high'] = (amount_zscore > 2).astype(int)
+        df['amount_very_low'] = (amount_zscore < -2).astype(int)
         
         return df
     
     def prepare_ml_data(self, test_size: float = 0.2, 
                        validation_size: float = 0.1,
-                       random_state: int = 42) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+                       random_state: int = 42,
+                       cache_dir: Optional[Union[str, Path]] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
         """
         Prepare data for machine learning
         
@@ -325,6 +380,8 @@ class PaySimLoader:
             test_size: Proportion of data for testing
             validation_size: Proportion of data for validation
             random_state: Random seed for reproducibility
+            cache_dir: If set, scaled matrices are written there as float32 .npy
+                files and returned as read-only memory maps
             
         Returns:
             Tuple of (data_splits, metadata)
@@ -345,7 +402,10 @@ class PaySimLoader:
         
         # Ensure all features are numeric
         for column in feature_df.columns:
-            if feature_df[column].dtype == 'object':
+            if isinstance(feature_df[column].dtype, pd.CategoricalDtype):
+                # Categorical columns (e.g. 'type' from PAYSIM_DTYPES) become their integer codes
+                feature_df[column] = feature_df[column].cat.codes
+            elif feature_df[column].dtype == 'object':
                 logger.warning(f"Non-numeric column found: {column}, attempting to convert...")
                 try:
                     feature_df[column] = pd.to_numeric(feature_df[column], errors='coerce')
@@ -356,8 +416,8 @@ class PaySimLoader:
         # Update feature columns list
         self.feature_columns = feature_df.columns.tolist()
         
-        # Handle missing values
-        feature_df = feature_df.fillna(0)
+        # Handle missing values; float32 halves the bytes every model scans (XGBoost reads it without upcasting)
+        feature_df = feature_df.fillna(0).astype(np.float32)
         
         logger.info(f"Final feature matrix shape: {feature_df.shape}")
         logger.info(f"Feature types: {feature_df.dtypes.value_counts()}")
@@ -383,6 +443,17 @@ class PaySimLoader:
         # Store scaler for later use
         self.scalers['standard'] = scaler
         
+        # Spill scaled matrices to disk so every model reads the same page-cache copy
+        if cache_dir is not None:
+            mapped = self._memmap_arrays(cache_dir, {
+                'X_train': X_train_scaled,
+                'X_val': X_val_scaled,
+                'X_test': X_test_scaled
+            })
+            X_train_scaled = mapped['X_train']
+            X_val_scaled = mapped['X_val']
+            X_test_scaled = mapped['X_test']
+        
         # Prepare data splits
         data_splits = {
             'X_train': X_train_scaled,
@@ -423,6 +494,38 @@ class PaySimLoader:
         
         return data_splits, metadata
     
+    def _memmap_arrays(self, cache_dir: Union[str, Path],
+                       arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Save arrays as float32 .npy files and reload them memory-mapped
+        
+        Files are written under a temporary name and renamed into place, so
+        maps handed out by an earlier call keep pointing at their own data.
+        Callers delete them with release_memmaps once nothing reopens them.
+        
+        Args:
+            cache_dir: Directory for the .npy files
+            arrays: Arrays to spill, keyed by name
+            
+        Returns:
+            Read-only memory-mapped arrays with the same keys
+        """
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        
+        mapped = {}
+        for name, array in arrays.items():
+            path = cache_dir / f"{name}.{pid}.npy"
+            tmp_path = cache_dir / f"{name}.{pid}.npy.tmp"
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array, dtype=np.float32))
+            os.replace(tmp_path, path)
+            mapped[name] = np.load(path, mmap_mode='r')
+        
+        logger.info(f"💾 Memory-mapped {len(mapped)} matrices from {cache_dir}")
+        return mapped
+    
     def get_feature_importance_data(self) -> Dict[str, Any]:
         """Get data for feature importance analysis"""
         if not self.feature_columns:
@@ -440,14 +543,159 @@ class PaySimLoader:
             }
         }
 
+def release_memmaps(arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Delete the .npy files behind prepare_ml_data's memory-mapped matrices
+    
+    Maps already open stay readable (the data lives until the last one closes);
+    only reopening the path is no longer possible.
+    
+    Args:
+        arrays: Data splits as returned by prepare_ml_data
+    """
+    for array in arrays.values():
+        if isinstance(array, np.memmap) and array.filename:
+            try:
+                os.remove(array.filename)
+            except OSError as e:
+                logger.warning(f"Could not remove memory-mapped file {array.filename}: {e}")
+
+def ensure_parquet_snapshot(dataset_path: Union[str, Path] = DEFAULT_DATASET_PATH) -> Path:
+    """
+    Convert the PaySim CSV to a Snappy-compressed Parquet file next to it
+    
+    The conversion runs only when the snapshot is missing, older than the CSV
+    or written with different column types than PAYSIM_ARROW_TYPES, so the text
+    parse is paid once rather than on every load.
+    
+    Args:
+        dataset_path: Path to the PaySim CSV
+        
+    Returns:
+        Path to the up-to-date Parquet snapshot
+    """
+    csv_path = Path(dataset_path)
+    parquet_path = csv_path.with_suffix('.parquet')
+    
+    if parquet_path.exists() and (not csv_path.exists() or
+                                  parquet_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns):
+        if not csv_path.exists() or _snapshot_schema_matches(parquet_path):
+            return parquet_path
+        logger.info(f"🔁 Parquet snapshot {parquet_path.name} has stale column types")
+    
+    logger.info(f"🗜️ Converting {csv_path.name} to Parquet snapshot")
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=PAYSIM_ARROW_TYPES,
+            include_columns=list(PAYSIM_ARROW_TYPES)
+        )
+    )
+    
+    # Write to a temp file and swap it in so readers never see a partial snapshot
+    tmp_path = parquet_path.with_name(f"{parquet_path.name}.{os.getpid()}.tmp")
+    pq.write_table(table, tmp_path, compression='snappy', row_group_size=1 << 16)
+    os.replace(tmp_path, parquet_path)
+    logger.info(f"💾 Parquet snapshot written to {parquet_path}")
+    
+    return parquet_path
+
+def _snapshot_schema_matches(parquet_path: Path) -> bool:
+    """Whether a Parquet snapshot's columns have the PAYSIM_ARROW_TYPES types"""
+    schema = pq.read_schema(parquet_path)
+    return all(
+        name in schema.names and schema.field(name).type == arrow_type
+        for name, arrow_type in PAYSIM_ARROW_TYPES.items()
+    )
+
+def read_paysim(dataset_path: Union[str, Path] = DEFAULT_DATASET_PATH) -> pd.DataFrame:
+    """
+    Read the full PaySim dataset once with explicit column types
+    
+    Reads the Parquet snapshot (creating it on first use) with multithreaded
+    column decoding; columns stay NumPy-backed (float64/int32/int8/category)
+    so the feature helpers get plain ndarrays.
+    
+    Args:
+        dataset_path: Path to the PaySim CSV
+        
+    Returns:
+        Raw PaySim DataFrame, ready to pass to PaySimLoader.load_dataset(df=...)
+    """
+    table = pq.read_table(ensure_parquet_snapshot(dataset_path),
+                          columns=list(PAYSIM_DTYPES), use_threads=True)
+    df = table.to_pandas().astype({'nameOrig': 'object', 'nameDest': 'object'})
+    logger.info(f"📊 Loaded full dataset: {len(df):,} transactions")
+    return df
+
+def read_paysim_sample(sample_size: int, random_state: int = 0,
+                       dataset_path: Union[str, Path] = DEFAULT_DATASET_PATH) -> pd.DataFrame:
+    """
+    Read a uniform random sample of PaySim rows without loading the full dataset
+    
+    Row positions are drawn from the snapshot's row count, then each Parquet row
+    group holding any of them is read and filtered in turn, so peak memory is one
+    row group plus the sample.
+    
+    Args:
+        sample_size: Rows to sample (capped at the dataset size)
+        random_state: Seed of the row draw; the same seed gives the same rows
+        dataset_path: Path to the PaySim CSV
+        
+    Returns:
+        Raw PaySim DataFrame in snapshot order, like read_paysim's
+    """
+    parquet_file = pq.ParquetFile(ensure_parquet_snapshot(dataset_path))
+    num_rows = parquet_file.metadata.num_rows
+    rows = np.sort(np.random.default_rng(random_state).choice(
+        num_rows, min(sample_size, num_rows), replace=False))
+    
+    tables = []
+    group_start = 0
+    for group in range(parquet_file.num_row_groups):
+        group_stop = group_start + parquet_file.metadata.row_group(group).num_rows
+        lo, hi = np.searchsorted(rows, [group_start, group_stop])
+        if hi > lo:
+            table = parquet_file.read_row_group(group, columns=list(PAYSIM_DTYPES))
+            tables.append(table.take(pa.array(rows[lo:hi] - group_start)))
+        group_start = group_stop
+    
+    table = pa.concat_tables(tables) if tables else parquet_file.schema_arrow.empty_table()
+    return table.to_pandas().astype({'nameOrig': 'object', 'nameDest': 'object'})
+
+def iter_paysim_batches(dataset_path: Union[str, Path] = DEFAULT_DATASET_PATH,
+                        batch_size: int = 100_000,
+                        columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream the PaySim dataset from its Parquet snapshot in record batches
+    
+    Only one batch is materialized at a time, so peak memory is bounded by
+    batch_size rather than by the dataset.
+    
+    Args:
+        dataset_path: Path to the PaySim CSV
+        batch_size: Maximum rows per batch
+        columns: Columns to read (None reads all of them)
+        
+    Yields:
+        Raw PaySim DataFrame per batch
+    """
+    dataset = pa_ds.dataset(ensure_parquet_snapshot(dataset_path), format='parquet')
+    for batch in dataset.to_batches(columns=list(columns) if columns else None, batch_size=batch_size):
+        yield batch.to_pandas()
+
 def load_paysim_for_training(sample_size: int = 100000, 
-                           balance_data: bool = True) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+                           balance_data: bool = True,
+                           cache_dir: Optional[Union[str, Path]] = None,
+                           df: Optional[pd.DataFrame] = None) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
     """
     Convenience function to load and prepare PaySim data for training
     
     Args:
         sample_size: Number of samples to load (None for full dataset)
         balance_data: Whether to balance fraud/non-fraud samples
+        cache_dir: Directory for memory-mapped train/val/test matrices (None keeps them in RAM)
+        df: Preloaded PaySim frame (skips reading the CSV)
         
     Returns:
         Tuple of (data_splits, metadata)
@@ -455,13 +703,13 @@ def load_paysim_for_training(sample_size: int = 100000,
     loader = PaySimLoader()
     
     # Load dataset
-    loader.load_dataset(sample_size=sample_size, balance_fraud=balance_data)
+    loader.load_dataset(sample_size=sample_size, balance_fraud=balance_data, df=df)
     
     # Engineer features
     loader.engineer_features()
     
     # Prepare for ML
-    return loader.prepare_ml_data()
+    return loader.prepare_ml_data(cache_dir=cache_dir)
 
 if __name__ == "__main__":
     # Test the loader
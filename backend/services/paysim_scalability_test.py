@@ -3,12 +3,23 @@ PaySim Scalability Test
 Tests the PaySim integration with different sample sizes to find optimal balance
 """
 
+import hashlib
+import io
+import json
 import logging
+import os
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 from typing import Dict, Any
+import joblib
 import numpy as np
+from threadpoolctl import threadpool_limits
 
 from paysim_integration import PaySimFraudDetector
+from paysim_loader import ensure_parquet_snapshot, read_paysim_sample
+from production_paysim import PRODUCTION_CONFIG
 
 # Configure logging
 logging.basicConfig(
@@ -17,8 +28,104 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def test_sample_sizes():
-    """Test different sample sizes to find optimal performance/speed balance"""
+# Numeric view of one sweep trial, for vectorized recommendations
+TRIAL_DTYPE = np.dtype([
+    ('sample_size', 'i8'),
+    ('duration_minutes', 'f8'),
+    ('ensemble_auc', 'f8'),
+    ('best_individual_auc', 'f8'),
+    ('ok', '?')
+])
+
+# Trained trials are memoized here, keyed by (sample_size, trial config, snapshot mtime)
+CACHE_DIR = Path(".cache/paysim")
+
+# The detector parameters a trial trains with, as canonical JSON. This is the
+# config part of the cache key, so production settings the trial never applies
+# don't invalidate trained trials
+TRIAL_CONFIG_JSON = json.dumps({
+    "enabled_models": sorted(PRODUCTION_CONFIG["ensemble_models_enabled"]),
+    "xgb_params": dict(PRODUCTION_CONFIG["xgb_params"]),
+}, sort_keys=True)
+
+def _train_one(sample_size: int, trial_config: str, data_mtime_ns: int,
+               n_jobs: int) -> Dict[str, Any]:
+    """
+    Train one sweep trial inside a worker process
+    
+    The worker reads its own rows from the Parquet snapshot (a fixed-seed
+    sample, so sample_size, trial_config and data_mtime_ns determine the trial
+    and form the cache key). Nothing large crosses the process boundary.
+    Failures raise so they are not memoized.
+    
+    Args:
+        sample_size: Nominal sample size of the trial
+        trial_config: Canonical JSON of the detector parameters (TRIAL_CONFIG_JSON)
+        data_mtime_ns: Modification time of the PaySim Parquet snapshot
+        n_jobs: Threads this worker may use for BLAS/OpenMP and the models
+        
+    Returns:
+        Result row for the sweep table
+    """
+    start_ns = time.perf_counter_ns()
+    
+    # Initialize detector on the trial's sample of the snapshot
+    config = json.loads(trial_config)
+    trial_df = read_paysim_sample(sample_size, random_state=0)
+    detector = PaySimFraudDetector.from_dataframe(
+        trial_df, n_jobs=n_jobs,
+        xgb_params=config["xgb_params"],
+        enabled_models=frozenset(config["enabled_models"])
+    )
+    
+    # Train models (sweep trials don't overwrite the saved production models). The
+    # BLAS/OpenMP pools were loaded before the fork, so they are capped here rather
+    # than through OMP_NUM_THREADS/MKL_NUM_THREADS, which they have already read
+    with threadpool_limits(limits=n_jobs):
+        training_results = detector.train_models(save_models=False)
+    
+    duration = (time.perf_counter_ns() - start_ns) / 1e9
+    
+    # Keep the fitted estimators next to the memoized result, without the training frame.
+    # The name carries the whole cache key, so a newer config or snapshot never
+    # overwrites the artifact an older memoized result points to
+    detector.data = None
+    key_digest = hashlib.sha1(f"{trial_config}:{data_mtime_ns}".encode()).hexdigest()[:16]
+    detector_path = CACHE_DIR / "detectors" / f"detector_{sample_size}_{key_digest}.joblib"
+    detector_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(detector, detector_path, compress=3)
+    
+    # Extract performance metrics
+    ensemble_auc = 0.0
+    individual_aucs = {}
+    
+    if 'performance' in training_results:
+        ensemble_auc = training_results['performance'].get('ensemble_test_auc', 0.0)
+        if 'individual_test_auc' in training_results['performance']:
+            individual_aucs = training_results['performance']['individual_test_auc']
+    
+    return {
+        'sample_size': sample_size,
+        'duration_minutes': duration / 60,
+        'ensemble_auc': ensemble_auc,
+        'best_individual_auc': max(individual_aucs.values()) if individual_aucs else 0.0,
+        'training_samples': training_results.get('metadata', {}).get('n_train', 0),
+        'fraud_rate': training_results.get('metadata', {}).get('fraud_rate', 0.0),
+        'detector_path': str(detector_path)
+    }
+
+_cached_train_one = joblib.Memory(location=CACHE_DIR, verbose=0).cache(
+    _train_one, ignore=['n_jobs']
+)
+
+def test_sample_sizes(results_path: str = "paysim_scalability_results.jsonl"):
+    """
+    Test different sample sizes to find optimal performance/speed balance
+    
+    Trials run concurrently in separate processes, each pinned to an equal
+    share of the CPUs. Each trial is appended to results_path as one JSON
+    line as soon as it finishes, so partial sweeps survive an interrupt.
+    """
     
     # Test different sample sizes
     sample_sizes = [
@@ -29,110 +136,124 @@ def test_sample_sizes():
         500_000,   # Maximum practical size
     ]
     
-    results = []
+    # Trial dicts (for the JSON log and error messages) and their numeric view, by sweep position
+    results = [None] * len(sample_sizes)
+    summary = np.zeros(len(sample_sizes), dtype=TRIAL_DTYPE)
+    
+    # Cache key parts shared by every trial. The snapshot's mtime rather than the
+    # CSV's: the CSV may be absent, and the snapshot is rewritten whenever the CSV
+    # or the column types change
+    trial_config = TRIAL_CONFIG_JSON
+    data_mtime_ns = os.stat(ensure_parquet_snapshot()).st_mtime_ns
+    
+    # One CPU share per concurrent trial beats all CPUs per sequential trial on small data
+    n_workers = min(len(sample_sizes), os.cpu_count() or 1)
+    n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+    logger.info("🧵 Running %d trials on %d processes (%d threads each)", len(sample_sizes), n_workers, n_jobs)
     
-    for sample_size in sample_sizes:
-        logger.info(f"\n🧪 Testing with {sample_size:,} transactions...")
+    with open(results_path, 'w', buffering=1) as results_file, \
+         ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {}
+        for i, sample_size in enumerate(sample_sizes):
+            logger.info("\n🧪 Testing with %d transactions...", sample_size)
+            future = pool.submit(_cached_train_one, sample_size, trial_config, data_mtime_ns, n_jobs)
+            futures[future] = i
         
-        try:
-            start_time = time.time()
-            
-            # Initialize detector
-            detector = PaySimFraudDetector(model_sample_size=sample_size)
-            
-            # Train models
-            training_results = detector.train_models()
-            
-            end_time = time.time()
-            duration = end_time - start_time
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                sample_size = sample_sizes[i]
+                logger.error("❌ Failed for sample size %d: %s", sample_size, e)
+                
+                result = {
+                    'sample_size': sample_size,
+                    'duration_minutes': -1,
+                    'ensemble_auc': 0.0,
+                    'best_individual_auc': 0.0,
+                    'training_samples': 0,
+                    'fraud_rate': 0.0,
+                    'error': str(e)
+                }
             
-            # Extract performance metrics
-            ensemble_auc = 0.0
-            individual_aucs = {}
+            ok = 'error' not in result
+            summary[i] = (
+                result['sample_size'],
+                result['duration_minutes'],
+                result['ensemble_auc'],
+                result['best_individual_auc'],
+                ok
+            )
+            results[i] = result
             
-            if 'performance' in training_results:
-                ensemble_auc = training_results['performance'].get('ensemble_test_auc', 0.0)
-                if 'individual_test_auc' in training_results['performance']:
-                    individual_aucs = training_results['performance']['individual_test_auc']
+            if ok:
+                logger.info("✅ Sample %d: AUC=%.3f, Time=%.1fmin",
+                            result['sample_size'], result['ensemble_auc'], result['duration_minutes'])
             
-            result = {
-                'sample_size': sample_size,
-                'duration_minutes': duration / 60,
-                'ensemble_auc': ensemble_auc,
-                'best_individual_auc': max(individual_aucs.values()) if individual_aucs else 0.0,
-                'training_samples': training_results.get('metadata', {}).get('n_train', 0),
-                'fraud_rate': training_results.get('metadata', {}).get('fraud_rate', 0.0)
-            }
-            
-            results.append(result)
-            
-            logger.info(f"✅ Sample {sample_size:,}: AUC={ensemble_auc:.3f}, Time={duration/60:.1f}min")
-            
-        except Exception as e:
-            logger.error(f"❌ Failed for sample size {sample_size:,}: {str(e)}")
-            
-            result = {
-                'sample_size': sample_size,
-                'duration_minutes': -1,
-                'ensemble_auc': 0.0,
-                'best_individual_auc': 0.0,
-                'training_samples': 0,
-                'fraud_rate': 0.0,
-                'error': str(e)
-            }
-            results.append(result)
-    
-    # Print summary
-    print("\n" + "="*80)
-    print("📊 PAYSIM SCALABILITY TEST RESULTS")
-    print("="*80)
-    print(f"{'Sample Size':<12} {'Duration':<10} {'Ensemble AUC':<12} {'Best Model':<12} {'Training':<10}")
-    print("-" * 80)
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+    
+    logger.info("💾 Trial results written to %s", results_path)
+    
+    # Build the summary report, then write it in one go
+    report = io.StringIO()
+    report.write("\n" + "="*80 + "\n")
+    report.write("📊 PAYSIM SCALABILITY TEST RESULTS\n")
+    report.write("="*80 + "\n")
+    report.write(f"{'Sample Size':<12} {'Duration':<10} {'Ensemble AUC':<12} {'Best Model':<12} {'Training':<10}\n")
+    report.write("-" * 80 + "\n")
     
     for result in results:
         if 'error' not in result:
-            print(f"{result['sample_size']:>10,} | "
-                  f"{result['duration_minutes']:>8.1f}min | "
-                  f"{result['ensemble_auc']:>10.3f} | "
-                  f"{result['best_individual_auc']:>10.3f} | "
-                  f"{result['training_samples']:>8,}")
+            report.write(f"{result['sample_size']:>10,} | "
+                         f"{result['duration_minutes']:>8.1f}min | "
+                         f"{result['ensemble_auc']:>10.3f} | "
+                         f"{result['best_individual_auc']:>10.3f} | "
+                         f"{result['training_samples']:>8,}\n")
         else:
-            print(f"{result['sample_size']:>10,} | ERROR: {result['error']}")
+            report.write(f"{result['sample_size']:>10,} | ERROR: {result['error']}\n")
     
-    print("\n🎯 RECOMMENDATIONS:")
+    report.write("\n🎯 RECOMMENDATIONS:\n")
     
     # Find best performance/time ratio
-    valid_results = [r for r in results if 'error' not in r and r['ensemble_auc'] > 0]
+    valid = summary['ok'] & (summary['ensemble_auc'] > 0)
     
-    if valid_results:
-        # Calculate efficiency score (AUC per minute)
-        for r in valid_results:
-            r['efficiency'] = r['ensemble_auc'] / max(r['duration_minutes'], 0.1)
+    if valid.any():
+        # Efficiency score (AUC per minute); invalid trials can never win
+        efficiency = np.where(
+            valid,
+            summary['ensemble_auc'] / np.maximum(summary['duration_minutes'], 0.1),
+            -np.inf
+        )
+        auc = np.where(valid, summary['ensemble_auc'], -np.inf)
         
-        best_efficiency = max(valid_results, key=lambda x: x['efficiency'])
-        best_performance = max(valid_results, key=lambda x: x['ensemble_auc'])
+        best_efficiency = summary[np.argmax(efficiency)]
+        best_performance = summary[np.argmax(auc)]
         
-        print(f"• Best efficiency: {best_efficiency['sample_size']:,} samples "
-              f"(AUC={best_efficiency['ensemble_auc']:.3f}, {best_efficiency['duration_minutes']:.1f}min)")
-        print(f"• Best performance: {best_performance['sample_size']:,} samples "
-              f"(AUC={best_performance['ensemble_auc']:.3f}, {best_performance['duration_minutes']:.1f}min)")
+        report.write(f"• Best efficiency: {best_efficiency['sample_size']:,} samples "
+                     f"(AUC={best_efficiency['ensemble_auc']:.3f}, {best_efficiency['duration_minutes']:.1f}min)\n")
+        report.write(f"• Best performance: {best_performance['sample_size']:,} samples "
+                     f"(AUC={best_performance['ensemble_auc']:.3f}, {best_performance['duration_minutes']:.1f}min)\n")
         
         if best_efficiency['sample_size'] != best_performance['sample_size']:
-            print(f"• Recommended: {best_efficiency['sample_size']:,} for development, "
-                  f"{best_performance['sample_size']:,} for production")
+            report.write(f"• Recommended: {best_efficiency['sample_size']:,} for development, "
+                         f"{best_performance['sample_size']:,} for production\n")
         else:
-            print(f"• Recommended: {best_efficiency['sample_size']:,} samples (optimal balance)")
+            report.write(f"• Recommended: {best_efficiency['sample_size']:,} samples (optimal balance)\n")
+    
+    sys.stdout.write(report.getvalue())
     
     return results
 
 def train_full_scale_model(sample_size: int = 500_000):
     """Train a production-scale PaySim model"""
     
-    logger.info(f"\n🚀 Training production-scale PaySim model...")
-    logger.info(f"📊 Sample size: {sample_size:,} transactions")
-    logger.info(f"⏱️ Expected training time: 10-30 minutes")
+    logger.info("\n🚀 Training production-scale PaySim model...")
+    logger.info("📊 Sample size: %d transactions", sample_size)
+    logger.info("⏱️ Expected training time: 10-30 minutes")
     
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     # Initialize with large sample
     detector = PaySimFraudDetector(model_sample_size=sample_size)
@@ -140,20 +261,19 @@ def train_full_scale_model(sample_size: int = 500_000):
     # Train models
     results = detector.train_models()
     
-    end_time = time.time()
-    duration = end_time - start_time
+    duration = (time.perf_counter_ns() - start_ns) / 1e9
     
-    logger.info(f"\n✅ Production model training complete!")
-    logger.info(f"⏱️ Training time: {duration/60:.1f} minutes")
+    logger.info("\n✅ Production model training complete!")
+    logger.info("⏱️ Training time: %.1f minutes", duration / 60)
     
     if 'performance' in results:
         perf = results['performance']
-        logger.info(f"🎯 Ensemble AUC: {perf.get('ensemble_test_auc', 0.0):.3f}")
+        logger.info("🎯 Ensemble AUC: %.3f", perf.get('ensemble_test_auc', 0.0))
         
         if 'individual_test_auc' in perf:
             logger.info("🤖 Individual model performance:")
             for model, auc in perf['individual_test_auc'].items():
-                logger.info(f"   {model}: {auc:.3f}")
+                logger.info("   %s: %.3f", model, auc)
     
     return detector, results
 
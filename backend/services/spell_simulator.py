@@ -1,15 +1,423 @@
 import numpy as np
-import networkx as nx
+from scipy import sparse
 import random
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import logging
-from datetime import datetime, timedelta
 import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import cached_property
+
+try:
+    import igraph as ig
+    IGRAPH_AVAILABLE = True
+except ImportError:
+    ig = None
+    IGRAPH_AVAILABLE = False
 
 from models.pydantic_schemas import SpellType, SpellContext
+from services._numba_compat import NUMBA_AVAILABLE, njit, prange
 
 logger = logging.getLogger(__name__)
 
+# Demo deployments keep the simulated run time of each spell ("realism_delay")
+SPELL_DEMO_MODE = os.getenv("SPELL_DEMO_MODE", "false").lower() in ("1", "true", "yes")
+
+# Spells waiting for the generation worker before execute_spell callers block
+GENERATION_QUEUE_SIZE = 4
+
+# Worker processes execute_many may run at once
+SPELL_POOL_WORKERS = min(4, os.cpu_count() or 1)
+
+# Assets whose price feeds the oracle manipulation spell attacks
+ORACLE_ASSETS = np.array(["ETH", "BTC", "USDC", "DAI", "LINK"])
+
+# Column types of TransactionStore (phase labels are kept as codes alongside)
+TRANSACTION_DTYPES = {
+    "merchant_idx": np.int32,   # position in simulation_data["merchants"]
+    "user_idx": np.int32,       # position in simulation_data["users"]
+    "amount": np.float32,
+    "fraud_score": np.float32,
+    "timestamp_s": np.int64     # Unix seconds
+}
+
+# user_idx of parties outside the user table (e.g. flash loan attackers)
+NO_USER = -1
+
+# Attribute columns of the merchant and user tables
+MERCHANT_DTYPES = {
+    "transaction_count": np.int32,
+    "total_volume": np.float32,
+    "risk_score": np.float32,
+    "reputation": np.float32
+}
+USER_DTYPES = {
+    "transaction_count": np.int32,
+    "total_spent": np.float32,
+    "risk_profile": np.int8,    # index into RISK_PROFILES
+    "account_age": np.int32,    # days
+    "is_sybil": np.bool_,
+    "is_colluding": np.bool_
+}
+RISK_PROFILES = ("low", "medium", "high")
+
+class EntityTable:
+    """
+    Merchant / user attributes as one NumPy column per attribute
+    
+    Rows keep insertion order, so a row position is the merchant_idx / user_idx
+    of the transaction store. table[key] builds that row's dict on request.
+    """
+    
+    def __init__(self, dtypes: Dict[str, Any], categories: Optional[Dict[str, tuple]] = None):
+        """
+        Args:
+            dtypes: Column name -> dtype
+            categories: Column name -> labels, for int columns holding label indices
+        """
+        self.dtypes = dtypes
+        self.categories = categories or {}
+        self.columns = {column: np.empty(0, dtype=dtype) for column, dtype in dtypes.items()}
+        self._positions: Dict[str, int] = {}
+    
+    def upsert(self, keys: List[str], **values) -> np.ndarray:
+        """
+        Insert new keys (zero-filled) and set the given columns for all keys
+        
+        Args:
+            keys: Entity IDs; existing ones keep their position
+            **values: Column -> array of len(keys), or a scalar for all of them
+            
+        Returns:
+            int32 positions of keys
+        """
+        start = len(self._positions)
+        for key in keys:
+            self._positions.setdefault(key, len(self._positions))
+        
+        added = len(self._positions) - start
+        if added:
+            for column, dtype in self.dtypes.items():
+                self.columns[column] = np.concatenate([self.columns[column], np.zeros(added, dtype=dtype)])
+        
+        positions = self.positions(keys)
+        for column, column_values in values.items():
+            self.columns[column][positions] = column_values
+        return positions
+    
+    def positions(self, keys: List[str]) -> np.ndarray:
+        """int32 row positions of keys"""
+        return np.fromiter((self._positions[key] for key in keys), dtype=np.int32, count=len(keys))
+    
+    def keys(self) -> List[str]:
+        return list(self._positions)
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    def __iter__(self):
+        return iter(self._positions)
+    
+    def __contains__(self, key) -> bool:
+        return key in self._positions
+    
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        position = self._positions[key]
+        row = {column: values[position].item() for column, values in self.columns.items()}
+        for column, labels in self.categories.items():
+            row[column] = labels[row[column]]
+        return row
+
+def _empty_network() -> Dict[str, np.ndarray]:
+    """
+    Empty user-merchant network in CSR form
+    
+    Row r is the user at users-table position user_idx[r]; its edges are
+    indptr[r]:indptr[r + 1] of the merchant_idx / transaction_count / total_amount arrays.
+    """
+    return {
+        "user_idx": np.empty(0, dtype=np.int32),
+        "merchant_nodes": np.empty(0, dtype=np.int32),
+        "indptr": np.zeros(1, dtype=np.int64),
+        "merchant_idx": np.empty(0, dtype=np.int32),
+        "transaction_count": np.empty(0, dtype=np.int32),
+        "total_amount": np.empty(0, dtype=np.float32)
+    }
+
+def _iso_timestamps(timestamps_s) -> List[str]:
+    """ISO 8601 UTC strings for an array of Unix seconds, formatted in one vectorized call"""
+    return np.datetime_as_string(np.asarray(timestamps_s, dtype=np.int64).astype("datetime64[s]")).tolist()
+
+def _failed_result(error: Exception) -> Dict[str, Any]:
+    """Result returned for a spell whose execution raised"""
+    return {
+        "success": False,
+        "error": str(error),
+        "affected_transactions": 0,
+        "flagged_transactions": 0,
+        "total_impact": 0.0
+    }
+
+class TransactionStore:
+    """
+    Simulated transactions as one NumPy column per field (see TRANSACTION_DTYPES)
+    
+    Columns grow by doubling, so appends are amortized O(batch). store[column]
+    is a view of the filled part of a column and store[i] builds transaction i's
+    dict on request. Phase labels are kept as codes into self.phases.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self._columns = {column: np.empty(capacity, dtype=dtype) for column, dtype in TRANSACTION_DTYPES.items()}
+        self._phase_codes = np.empty(capacity, dtype=np.int16)
+        self.phases: List[str] = []
+        self._phase_lookup: Dict[str, int] = {}
+        
+        # Running count / sum / sum of squares of the numeric columns, updated on
+        # every append so store-wide means and variances are O(1)
+        self.stats = {column: {"count": 0, "sum_x": 0.0, "sum_x2": 0.0} for column in ("amount", "fraud_score")}
+    
+    def append(self, merchant_idx, user_idx, amounts, fraud_scores, timestamps_s, phase: str):
+        """
+        Append a batch of transactions
+        
+        Args:
+            merchant_idx: Merchant positions (array, or one scalar for the whole batch)
+            user_idx: User positions (array, or one scalar; NO_USER for outside parties)
+            amounts: Transaction amounts
+            fraud_scores: Fraud scores
+            timestamps_s: Unix timestamps in seconds
+            phase: Attack phase / pattern label shared by the batch
+        """
+        n = len(amounts)
+        self._reserve(self.size + n)
+        end = self.size + n
+        
+        for column, values in (("merchant_idx", merchant_idx), ("user_idx", user_idx),
+                               ("amount", amounts), ("fraud_score", fraud_scores),
+                               ("timestamp_s", timestamps_s)):
+            filled = self._columns[column][self.size:end]
+            filled[:] = values
+            
+            stats = self.stats.get(column)
+            if stats is not None:
+                batch = filled.astype(np.float64)
+                stats["count"] += n
+                stats["sum_x"] += float(batch.sum())
+                stats["sum_x2"] += float(np.dot(batch, batch))
+        
+        if phase not in self._phase_lookup:
+            self._phase_lookup[phase] = len(self.phases)
+            self.phases.append(phase)
+        self._phase_codes[self.size:end] = self._phase_lookup[phase]
+        self.size = end
+    
+    def _reserve(self, capacity: int):
+        """Grow every column (by doubling) to hold at least capacity rows"""
+        current = self._phase_codes.size
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, 2 * current)
+        for column, values in self._columns.items():
+            grown = np.empty(new_capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self._columns[column] = grown
+        grown = np.empty(new_capacity, dtype=self._phase_codes.dtype)
+        grown[:self.size] = self._phase_codes[:self.size]
+        self._phase_codes = grown
+    
+    def mean_var(self, column: str) -> Tuple[float, float]:
+        """Mean and (population) variance of a whole column from its running totals"""
+        stats = self.stats[column]
+        if stats["count"] == 0:
+            return 0.0, 0.0
+        mean = stats["sum_x"] / stats["count"]
+        return mean, max(stats["sum_x2"] / stats["count"] - mean * mean, 0.0)
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __getitem__(self, key):
+        """Column view by name ("phase" gives the labels), or one transaction's dict by index"""
+        if isinstance(key, str):
+            if key == "phase":
+                return np.asarray(self.phases, dtype=object)[self._phase_codes[:self.size]]
+            return self._columns[key][:self.size]
+        
+        if not -self.size <= key < self.size:
+            raise IndexError("transaction index out of range")
+        key %= self.size
+        row = {column: values[key].item() for column, values in self._columns.items()}
+        row["phase"] = self.phases[self._phase_codes[key]]
+        return row
+
+@njit(parallel=True, cache=True)
+def _gen_phase(n, amt_lo, amt_hi, score_lo, score_hi, merchant_count, user_count,
+               merchant_idx_out, user_idx_out, amount_out, score_out,
+               rand_u, rand_m, rand_amt, rand_score):
+    """
+    Fill one phase of uniformly drawn transactions
+    
+    The uniforms are drawn with NumPy beforehand; Numba's own RNG is slower
+    and not reproducible from self.rng.
+    
+    Args:
+        n: Transactions in the phase
+        amt_lo, amt_hi: Amount range
+        score_lo, score_hi: Fraud score range
+        merchant_count, user_count: Merchants / users drawn from positions [0, count);
+            must be positive when n > 0 (checked by _draw_phase)
+        merchant_idx_out, user_idx_out, amount_out, score_out: Preallocated outputs of length n
+        rand_u, rand_m, rand_amt, rand_score: float64 uniforms in [0, 1) of length n
+    """
+    amt_span = amt_hi - amt_lo
+    score_span = score_hi - score_lo
+    
+    for i in prange(n):
+        merchant_idx_out[i] = min(int(rand_m[i] * merchant_count), merchant_count - 1)
+        user_idx_out[i] = min(int(rand_u[i] * user_count), user_count - 1)
+        amount_out[i] = amt_lo + amt_span * rand_amt[i]
+        score_out[i] = score_lo + score_span * rand_score[i]
+
+# Independent partial counts _count_edges splits the buffer into
+EDGE_COUNT_CHUNKS = 16
+
+@njit(parallel=True, cache=True)
+def _count_edges(txn_user_idx, txn_merchant_idx, customer_local, merchant_local, n_customers, n_merchants):
+    """
+    Count the transactions of every (customer, merchant) pair of a subgraph
+    
+    Each chunk of the buffer counts into its own matrix, so the parallel
+    loop has no shared writes; the partial counts are summed at the end.
+    
+    Args:
+        txn_user_idx, txn_merchant_idx: user_idx / merchant_idx columns of the buffer
+        customer_local: User position -> subgraph row, -1 outside the subgraph
+        merchant_local: Merchant position -> subgraph column, -1 outside the subgraph
+        n_customers, n_merchants: Subgraph shape
+        
+    Returns:
+        int32 (n_customers, n_merchants) transaction counts
+    """
+    n = txn_user_idx.shape[0]
+    chunk = (n + EDGE_COUNT_CHUNKS - 1) // EDGE_COUNT_CHUNKS
+    partial = np.zeros((EDGE_COUNT_CHUNKS, n_customers, n_merchants), dtype=np.int32)
+    
+    for c in prange(EDGE_COUNT_CHUNKS):
+        for i in range(c * chunk, min(n, (c + 1) * chunk)):
+            u = txn_user_idx[i]
+            if u < 0:  # NO_USER
+                continue
+            row = customer_local[u]
+            col = merchant_local[txn_merchant_idx[i]]
+            if row >= 0 and col >= 0:
+                partial[c, row, col] += 1
+    
+    counts = np.zeros((n_customers, n_merchants), dtype=np.int32)
+    for c in range(EDGE_COUNT_CHUNKS):
+        counts += partial[c]
+    return counts
+
+def _count_edges_grouped(txn_user_idx, txn_merchant_idx, customer_local, merchant_local, n_customers, n_merchants):
+    """
+    _count_edges as a masked group-by-pair count in NumPy (one bincount over
+    flattened pair ids), for when numba is missing and the kernel would run
+    as an interpreted loop
+    """
+    rows = np.where(txn_user_idx >= 0, customer_local[txn_user_idx], -1)  # NO_USER stays outside
+    cols = merchant_local[txn_merchant_idx]
+    in_subgraph = (rows >= 0) & (cols >= 0)
+    pair_ids = rows[in_subgraph].astype(np.int64) * n_merchants + cols[in_subgraph]
+    counts = np.bincount(pair_ids, minlength=n_customers * n_merchants)
+    return counts.astype(np.int32).reshape(n_customers, n_merchants)
+
+def _igraph_clustering(weights: np.ndarray) -> float:
+    """
+    Average clustering of a bipartite subgraph given its
+    (customers x merchants) transaction counts, via igraph
+    """
+    n_customers, n_merchants = weights.shape
+    rows, cols = np.nonzero(weights)
+    graph = ig.Graph(n=n_customers + n_merchants,
+                     edges=list(zip(rows.tolist(), (cols + n_customers).tolist())))
+    # Nodes of degree < 2 count as 0, as in networkx
+    return graph.transitivity_avglocal_undirected(mode="zero") if graph.vcount() else 0
+
+def _sparse_clustering(weights: np.ndarray) -> float:
+    """_igraph_clustering on a scipy.sparse adjacency, for when igraph is not installed"""
+    # Symmetric 0/1 adjacency over customers then merchants
+    biadjacency = sparse.csr_matrix(weights)
+    adjacency = sparse.bmat([[None, biadjacency], [biadjacency.T, None]], format="csr")
+    adjacency.data[:] = 1
+    
+    # diag(A^3)/(k(k-1)), as nx.average_clustering computes it for a general graph
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    closed_walks = (adjacency @ adjacency @ adjacency).diagonal()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        node_clustering = closed_walks / (degrees * (degrees - 1))
+    # Nodes of degree < 2 count as 0, as in networkx
+    return float(np.nan_to_num(node_clustering, nan=0.0, posinf=0.0).mean()) if adjacency.shape[0] else 0
+
+@dataclass
+class CollusionReport:
+    """
+    Structure of a collusion subgraph, from its (customers x merchants)
+    transaction counts
+    
+    The counts and density are read straight off the matrix; clustering is the
+    only metric that needs the graph, so it is computed on first access and kept.
+    """
+    weights: np.ndarray
+    
+    @property
+    def customer_count(self) -> int:
+        return self.weights.shape[0]
+    
+    @property
+    def merchant_count(self) -> int:
+        return self.weights.shape[1]
+    
+    @property
+    def nodes(self) -> int:
+        return self.customer_count + self.merchant_count
+    
+    @property
+    def edges(self) -> int:
+        return int(np.count_nonzero(self.weights))
+    
+    @property
+    def density(self) -> float:
+        # 2|E|/(n(n-1)), as nx.density computes it for a general graph
+        n = self.nodes
+        return 2 * self.edges / (n * (n - 1)) if n > 1 else 0
+    
+    @property
+    def transaction_count(self) -> int:
+        return int(self.weights.sum())
+    
+    @cached_property
+    def clustering(self) -> float:
+        # C-backed igraph when installed
+        return _igraph_clustering(self.weights) if IGRAPH_AVAILABLE else _sparse_clustering(self.weights)
+    
+    def to_dict(self, include_clustering: bool = True) -> Dict[str, Any]:
+        """Summary dict; include_clustering=False leaves out the one graph metric"""
+        summary = {
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "density": self.density,
+            "merchant_count": self.merchant_count,
+            "customer_count": self.customer_count,
+            "transaction_count": self.transaction_count
+        }
+        if include_clustering:
+            summary["clustering"] = self.clustering
+        return summary
+
 class SpellSimulator:
     """
     Spell simulation engine for testing fraud detection scenarios.
@@ -24,10 +432,10 @@ class SpellSimulator:
     
     def __init__(self):
         self.simulation_data = {
-            "transactions": [],
-            "merchants": {},
-            "users": {},
-            "network_graph": nx.Graph()
+            "transactions": TransactionStore(),
+            "merchants": EntityTable(MERCHANT_DTYPES),
+            "users": EntityTable(USER_DTYPES, {"risk_profile": RISK_PROFILES}),
+            "network": _empty_network()
         }
         
         # Spell execution configurations
@@ -35,71 +443,189 @@ class SpellSimulator:
             "rug_pull": {
                 "duration_range": (300, 600),  # 5-10 minutes
                 "complexity": "medium",
-                "impact_multiplier": 2.5
+                "impact_multiplier": 2.5,
+                "realism_delay": 2.0 if SPELL_DEMO_MODE else 0.0
             },
             "oracle_manipulation": {
                 "duration_range": (600, 900),  # 10-15 minutes
                 "complexity": "high",
-                "impact_multiplier": 3.0
+                "impact_multiplier": 3.0,
+                "realism_delay": 3.0 if SPELL_DEMO_MODE else 0.0  # Longer simulation for oracle attacks
             },
             "sybil_attack": {
                 "duration_range": (900, 1200),  # 15-20 minutes
                 "complexity": "high",
-                "impact_multiplier": 2.0
+                "impact_multiplier": 2.0,
+                "realism_delay": 4.0 if SPELL_DEMO_MODE else 0.0  # Longer simulation for Sybil attacks
             },
             "flash_loan_attack": {
                 "duration_range": (180, 300),  # 3-5 minutes
                 "complexity": "critical",
-                "impact_multiplier": 4.0
+                "impact_multiplier": 4.0,
+                "realism_delay": 1.0 if SPELL_DEMO_MODE else 0.0  # Quick simulation for flash loans
             },
             "merchant_collusion": {
                 "duration_range": (1200, 1800),  # 20-30 minutes
                 "complexity": "high",
-                "impact_multiplier": 3.5
+                "impact_multiplier": 3.5,
+                "realism_delay": 5.0 if SPELL_DEMO_MODE else 0.0  # Longer simulation for collusion networks
             }
         }
         
+        # Spell generators by type
+        self._dispatch = {
+            SpellType.RUG_PULL: self._simulate_rug_pull,
+            SpellType.ORACLE_MANIPULATION: self._simulate_oracle_manipulation,
+            SpellType.SYBIL_ATTACK: self._simulate_sybil_attack,
+            SpellType.FLASH_LOAN_ATTACK: self._simulate_flash_loan_attack,
+            SpellType.MERCHANT_COLLUSION: self._simulate_merchant_collusion
+        }
+        
+        # Vectorized RNG for batched draws
+        self.rng = np.random.default_rng()
+        
+        # Generation pipeline (created on first execute_spell, inside the running loop)
+        self._queue: Optional[asyncio.Queue] = None
+        self._generation_worker: Optional[asyncio.Task] = None
+        
+        # Worker processes for execute_many (created on first use, released by close())
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
         logger.info("✅ Spell Simulator initialized")
     
+    @cached_property
+    def _configs_by_type(self) -> Dict[SpellType, Dict[str, Any]]:
+        """spell_configs keyed by SpellType, resolved once"""
+        return {spell_type: self.spell_configs.get(spell_type.value, {}) for spell_type in SpellType}
+    
     async def execute_spell(self, spell_type: SpellType, context: SpellContext, parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a fraud simulation spell"""
+        """
+        Execute a fraud simulation spell
+        
+        parameters["analytics"] = False skips the detection metrics and network
+        analyses, returning only the transaction counts and impact (e.g. for load tests).
+        "summary" keeps them but leaves out graph metrics that need the full network
+        (the collusion clustering coefficient).
+        """
         try:
-            logger.info(f"🔮 Executing spell: {spell_type.value}")
+            logger.info("🔮 Executing spell: %s", spell_type.value)
             
             # Get spell configuration
-            config = self.spell_configs.get(spell_type.value, {})
+            config = self._configs_by_type.get(spell_type, {})
             
-            # Initialize simulation environment
-            await self._setup_simulation_environment(context, parameters)
+            # Stage 1: queue the data generation for the worker thread
+            generated = asyncio.get_running_loop().create_future()
+            await self._generation_queue().put((spell_type, context, parameters, config, generated))
+            result = await generated
             
-            # Execute specific spell
-            if spell_type == SpellType.RUG_PULL:
-                result = await self._simulate_rug_pull(context, parameters, config)
-            elif spell_type == SpellType.ORACLE_MANIPULATION:
-                result = await self._simulate_oracle_manipulation(context, parameters, config)
-            elif spell_type == SpellType.SYBIL_ATTACK:
-                result = await self._simulate_sybil_attack(context, parameters, config)
-            elif spell_type == SpellType.FLASH_LOAN_ATTACK:
-                result = await self._simulate_flash_loan_attack(context, parameters, config)
-            elif spell_type == SpellType.MERCHANT_COLLUSION:
-                result = await self._simulate_merchant_collusion(context, parameters, config)
-            else:
-                raise ValueError(f"Unknown spell type: {spell_type.value}")
+            # Stage 2: simulated delay for realism; overlaps with generation of queued spells
+            delay = config.get("realism_delay", 0.0)
+            if delay:
+                await asyncio.sleep(delay)
             
-            logger.info(f"✅ Spell completed: {spell_type.value}")
+            logger.info("✅ Spell completed: %s", spell_type.value)
             return result
             
         except Exception as e:
-            logger.error(f"❌ Spell execution failed: {e}")
-            return {
-                "success": False,
-                "error": str(e),
-                "affected_transactions": 0,
-                "flagged_transactions": 0,
-                "total_impact": 0.0
-            }
+            logger.error("❌ Spell execution failed: %s", e)
+            return _failed_result(e)
+    
+    async def execute_many(self, specs: List[Tuple[SpellType, SpellContext, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute independent spells in parallel, one per worker process
+        
+        Each worker builds its own simulation environment, so the spells don't
+        see each other's transactions (nor this simulator's simulation_data).
+        
+        Args:
+            specs: (spell_type, context, parameters) for each spell
+            
+        Returns:
+            Spell results in the order of specs
+        """
+        if self._pool is None:
+            # Spawned, not forked: this process runs the event loop and the
+            # generation thread, and forking a threaded process is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=SPELL_POOL_WORKERS,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        
+        logger.info("🔮 Executing %d spells in parallel", len(specs))
+        loop = asyncio.get_running_loop()
+        jobs = [
+            (spell_type, context, parameters, self._configs_by_type.get(spell_type, {}))
+            for spell_type, context, parameters in specs
+        ]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, SpellSimulator._run_one, job) for job in jobs),
+            return_exceptions=True
+        )
+        
+        # Simulated delay for realism, once for the whole batch
+        delay = max((config.get("realism_delay", 0.0) for _, _, _, config in jobs), default=0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        
+        for (spell_type, _, _), result in zip(specs, results):
+            if isinstance(result, Exception):
+                logger.error("❌ Spell execution failed: %s: %s", spell_type.value, result)
+        
+        return [_failed_result(result) if isinstance(result, Exception) else result for result in results]
+    
+    async def close(self):
+        """Stop the generation worker and shut down the execute_many process pool"""
+        if self._generation_worker is not None and not self._generation_worker.done():
+            self._generation_worker.cancel()
+        self._generation_worker = None
+        
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            # Waiting for the workers to exit blocks, so keep it off the event loop
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+    
+    @staticmethod
+    def _run_one(job: Tuple[SpellType, SpellContext, Dict[str, Any], Dict[str, Any]]) -> Dict[str, Any]:
+        """Generate one spell in a worker process with a fresh simulator"""
+        spell_type, context, parameters, config = job
+        return SpellSimulator()._generate_spell(spell_type, context, parameters, config)
+    
+    def _generation_queue(self) -> asyncio.Queue:
+        """Bounded queue feeding the generation worker, started on first use"""
+        if self._generation_worker is None or self._generation_worker.done():
+            self._queue = asyncio.Queue(maxsize=GENERATION_QUEUE_SIZE)
+            self._generation_worker = asyncio.create_task(self._run_generation_worker(self._queue))
+        return self._queue
+    
+    async def _run_generation_worker(self, queue: asyncio.Queue):
+        """Generate queued spells one at a time on a worker thread (they share simulation_data)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            spell_type, context, parameters, config, result = await queue.get()
+            try:
+                spell_result = await loop.run_in_executor(
+                    None, self._generate_spell, spell_type, context, parameters, config
+                )
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+            else:
+                if not result.done():
+                    result.set_result(spell_result)
+            finally:
+                queue.task_done()
+    
+    def _generate_spell(self, spell_type: SpellType, context: SpellContext, parameters: Dict[str, Any],
+                        config: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the simulation environment and run one spell's data generation"""
+        # Initialize simulation environment
+        self._setup_simulation_environment(context, parameters)
+        
+        # Execute specific spell
+        handler = self._dispatch.get(spell_type)
+        if handler is None:
+            raise ValueError(f"Unknown spell type: {spell_type.value}")
+        return handler(context, parameters, config)
     
-    async def _setup_simulation_environment(self, context: SpellContext, parameters: Dict[str, Any]):
+    def _setup_simulation_environment(self, context: SpellContext, parameters: Dict[str, Any]):
         """Setup simulation environment with synthetic data"""
         # Generate synthetic merchants
         merchant_count = parameters.get("merchant_count", 10)
@@ -115,132 +641,108 @@ class SpellSimulator:
         else:
             users = [f"USER_{i:04d}" for i in range(user_count)]
         
-        # Create network graph
-        self.simulation_data["network_graph"] = nx.Graph()
+        # Add merchants and users, one draw per attribute column
+        n = len(merchants)
+        merchant_pos = self.simulation_data["merchants"].upsert(
+            merchants,
+            transaction_count=self.rng.integers(10, 101, n),
+            total_volume=self.rng.uniform(1000, 50000, n),
+            risk_score=self.rng.uniform(0.1, 0.9, n),
+            reputation=self.rng.uniform(0.5, 1.0, n)
+        )
         
-        # Add merchants and users as nodes
-        for merchant in merchants:
-            self.simulation_data["merchants"][merchant] = {
-                "transaction_count": random.randint(10, 100),
-                "total_volume": random.uniform(1000, 50000),
-                "risk_score": random.uniform(0.1, 0.9),
-                "reputation": random.uniform(0.5, 1.0)
-            }
-            self.simulation_data["network_graph"].add_node(merchant, node_type="merchant")
-        
-        for user in users:
-            self.simulation_data["users"][user] = {
-                "transaction_count": random.randint(5, 50),
-                "total_spent": random.uniform(500, 10000),
-                "risk_profile": random.choice(["low", "medium", "high"]),
-                "account_age": random.randint(30, 1000)
-            }
-            self.simulation_data["network_graph"].add_node(user, node_type="user")
-        
-        # Create edges between users and merchants
-        for user in users:
-            connected_merchants = random.sample(merchants, random.randint(1, min(5, len(merchants))))
-            for merchant in connected_merchants:
-                transaction_count = random.randint(1, 10)
-                total_amount = random.uniform(50, 1000) * transaction_count
-                self.simulation_data["network_graph"].add_edge(
-                    user, merchant,
-                    transaction_count=transaction_count,
-                    total_amount=total_amount
-                )
+        n = len(users)
+        user_pos = self.simulation_data["users"].upsert(
+            users,
+            transaction_count=self.rng.integers(5, 51, n),
+            total_spent=self.rng.uniform(500, 10000, n),
+            risk_profile=self.rng.integers(0, len(RISK_PROFILES), n),
+            account_age=self.rng.integers(30, 1001, n)
+        )
+        
+        # Create edges between users and merchants, all at once, as a CSR edge list
+        max_connected = min(5, len(merchants))
+        connected_counts = self.rng.integers(1, max_connected + 1, len(users))
+        # Each user's merchants are the first connected_counts[i] of a random permutation
+        # (argsort of noise), sampled without replacement for every user at once
+        permutations = np.argsort(self.rng.random((len(users), len(merchants))), axis=1)[:, :max_connected]
+        connected = permutations[np.arange(max_connected) < connected_counts[:, None]]
+        edge_count = int(connected_counts.sum())
+        transaction_counts = self.rng.integers(1, 11, edge_count)
+        
+        self.simulation_data["network"] = {
+            "user_idx": user_pos,
+            "merchant_nodes": merchant_pos,
+            "indptr": np.concatenate([[0], np.cumsum(connected_counts)]),
+            "merchant_idx": merchant_pos[connected],
+            "transaction_count": transaction_counts.astype(np.int32),
+            "total_amount": (self.rng.uniform(50, 1000, edge_count) * transaction_counts).astype(np.float32)
+        }
     
-    async def _simulate_rug_pull(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def _simulate_rug_pull(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate a rug pull attack where merchants disappear with funds"""
         
-        # Select target merchants for rug pull
+        analytics = parameters.get("analytics", True)
+        
+        # Select target merchants for rug pull (the first 3 merchant positions)
         target_merchants = list(self.simulation_data["merchants"].keys())[:3]  # Target 3 merchants
+        user_count = len(self.simulation_data["users"])
         
         affected_transactions = 0
         flagged_transactions = 0
         total_impact = 0.0
         
-        attack_timeline = []
+        now_s = int(time.time())
         
-        # Phase 1: Build reputation (first 30% of time)
-        reputation_building_transactions = random.randint(50, 100)
-        for _ in range(reputation_building_transactions):
-            merchant = random.choice(target_merchants)
-            user = random.choice(list(self.simulation_data["users"].keys()))
-            amount = random.uniform(10, 100)  # Small amounts to build trust
-            
-            transaction = {
-                "merchant": merchant,
-                "user": user,
-                "amount": amount,
-                "timestamp": datetime.utcnow() - timedelta(hours=random.randint(1, 72)),
-                "phase": "reputation_building",
-                "fraud_score": random.uniform(0.1, 0.3)  # Low fraud scores initially
-            }
-            
-            self.simulation_data["transactions"].append(transaction)
-            affected_transactions += 1
-            total_impact += amount
-        
-        # Phase 2: Escalation (middle 40% of time)
-        escalation_transactions = random.randint(30, 60)
-        for _ in range(escalation_transactions):
-            merchant = random.choice(target_merchants)
-            user = random.choice(list(self.simulation_data["users"].keys()))
-            amount = random.uniform(100, 500)  # Increasing amounts
-            
-            # Fraud scores start increasing
-            fraud_score = random.uniform(0.3, 0.6)
-            
-            transaction = {
-                "merchant": merchant,
-                "user": user,
-                "amount": amount,
-                "timestamp": datetime.utcnow() - timedelta(hours=random.randint(0, 24)),
-                "phase": "escalation",
-                "fraud_score": fraud_score
-            }
-            
-            self.simulation_data["transactions"].append(transaction)
-            affected_transactions += 1
-            total_impact += amount
-            
-            if fraud_score > 0.5:
-                flagged_transactions += 1
-        
-        # Phase 3: Rug pull execution (final 30% of time)
-        rug_pull_transactions = random.randint(20, 40)
-        for _ in range(rug_pull_transactions):
-            merchant = random.choice(target_merchants)
-            user = random.choice(list(self.simulation_data["users"].keys()))
-            amount = random.uniform(500, 2000)  # Large amounts during rug pull
-            
-            # High fraud scores during rug pull
-            fraud_score = random.uniform(0.7, 0.95)
-            
-            transaction = {
-                "merchant": merchant,
-                "user": user,
-                "amount": amount,
-                "timestamp": datetime.utcnow() - timedelta(minutes=random.randint(0, 60)),
-                "phase": "rug_pull",
-                "fraud_score": fraud_score
-            }
+        # (phase, count range, amount range, fraud score range, offset unit in seconds, offset range)
+        phases = [
+            # Phase 1: Build reputation (first 30% of time) - small amounts, low fraud scores
+            ("reputation_building", (50, 100), (10, 100), (0.1, 0.3), 3600, (1, 72)),
+            # Phase 2: Escalation (middle 40% of time) - increasing amounts and fraud scores
+            ("escalation", (30, 60), (100, 500), (0.3, 0.6), 3600, (0, 24)),
+            # Phase 3: Rug pull execution (final 30% of time) - large amounts, high fraud scores
+            ("rug_pull", (20, 40), (500, 2000), (0.7, 0.95), 60, (0, 60)),
+        ]
+        
+        for phase, count_range, amount_range, score_range, offset_unit, offset_range in phases:
+            # Draw the whole phase at once
+            n = int(self.rng.integers(count_range[0], count_range[1] + 1))
+            merchant_idx, user_idx, amounts, fraud_scores = self._draw_phase(
+                n, len(target_merchants), user_count, amount_range, score_range
+            )
+            timestamps = now_s - offset_unit * self.rng.integers(offset_range[0], offset_range[1] + 1, n)
             
-            self.simulation_data["transactions"].append(transaction)
-            affected_transactions += 1
-            total_impact += amount
-            flagged_transactions += 1
+            self._append_transactions(merchant_idx, user_idx, amounts, fraud_scores, timestamps, phase)
             
-            attack_timeline.append({
-                "timestamp": transaction["timestamp"].isoformat(),
-                "event": "large_withdrawal",
-                "merchant": merchant,
-                "amount": amount,
-                "fraud_score": fraud_score
-            })
+            affected_transactions += n
+            total_impact += float(amounts.sum(dtype=np.float64))
+            # Every rug pull withdrawal is flagged; earlier phases only above 0.5
+            flagged_transactions += n if phase == "rug_pull" else int((fraud_scores > 0.5).sum())
         
-        # Simulate short delay for realism
-        await asyncio.sleep(2)
+        # Timeline of the rug pull phase: the last batch drawn is already in
+        # columnar form, so records are only materialized when asked for
+        if parameters.get("timeline_format", "records") == "columns":
+            attack_timeline = {
+                "timestamp_s": timestamps.tolist(),
+                "event": "large_withdrawal",
+                "merchant_idx": merchant_idx.tolist(),
+                "merchants": target_merchants,
+                "amount": amounts.tolist(),
+                "fraud_score": fraud_scores.tolist()
+            }
+        else:
+            attack_timeline = [
+                {
+                    "timestamp": ts,
+                    "event": "large_withdrawal",
+                    "merchant": target_merchants[m],
+                    "amount": amount,
+                    "fraud_score": fraud_score
+                }
+                for ts, m, amount, fraud_score in zip(
+                    _iso_timestamps(timestamps), merchant_idx.tolist(), amounts.tolist(), fraud_scores.tolist()
+                )
+            ]
         
         return {
             "success": True,
@@ -254,75 +756,59 @@ class SpellSimulator:
             "detection_metrics": {
                 "early_detection_rate": flagged_transactions / affected_transactions if affected_transactions > 0 else 0,
                 "false_positive_rate": random.uniform(0.05, 0.15),
-                "average_fraud_score": sum(t["fraud_score"] for t in self.simulation_data["transactions"]) / len(self.simulation_data["transactions"])
-            }
+                "average_fraud_score": self.simulation_data["transactions"].mean_var("fraud_score")[0]
+            } if analytics else {}
         }
     
-    async def _simulate_oracle_manipulation(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def _simulate_oracle_manipulation(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate oracle price manipulation attack"""
         
-        affected_transactions = 0
-        flagged_transactions = 0
-        total_impact = 0.0
+        analytics = parameters.get("analytics", True)
         
-        price_manipulations = []
+        merchant_count = len(self.simulation_data["merchants"])
+        user_count = len(self.simulation_data["users"])
+        now_s = int(time.time())
         
-        # Simulate price feed manipulation events
-        manipulation_events = random.randint(5, 15)
+        # Simulate price feed manipulation events; every per-event draw is made up front
+        manipulation_events = int(self.rng.integers(5, 16))
+        assets = ORACLE_ASSETS[self.rng.integers(0, ORACLE_ASSETS.size, manipulation_events)]
+        normal_prices = self.rng.uniform(100, 2000, manipulation_events)
+        factors = self.rng.uniform(0.7, 1.4, manipulation_events)  # ±30% manipulation
+        durations = self.rng.integers(5, 31, manipulation_events)  # minutes
+        event_times = now_s - 60 * self.rng.integers(0, 121, manipulation_events)
+        affected_counts = self.rng.integers(10, 31, manipulation_events)
         
-        for i in range(manipulation_events):
-            # Select random asset
-            asset = random.choice(["ETH", "BTC", "USDC", "DAI", "LINK"])
-            
-            # Generate price manipulation
-            normal_price = random.uniform(100, 2000)
-            manipulated_price = normal_price * random.uniform(0.7, 1.4)  # ±30% manipulation
-            manipulation_duration = random.randint(5, 30)  # minutes
-            
-            price_manipulation = {
+        price_manipulations = [
+            {
                 "asset": asset,
                 "normal_price": normal_price,
-                "manipulated_price": manipulated_price,
-                "manipulation_factor": manipulated_price / normal_price,
-                "duration_minutes": manipulation_duration,
-                "timestamp": datetime.utcnow() - timedelta(minutes=random.randint(0, 120))
+                "manipulated_price": normal_price * factor,
+                "manipulation_factor": factor,
+                "duration_minutes": duration,
+                "timestamp": event_iso
             }
-            
-            price_manipulations.append(price_manipulation)
-            
-            # Generate transactions affected by price manipulation
-            affected_txn_count = random.randint(10, 30)
-            
-            for _ in range(affected_txn_count):
-                merchant = random.choice(list(self.simulation_data["merchants"].keys()))
-                user = random.choice(list(self.simulation_data["users"].keys()))
-                
-                # Transaction amount affected by manipulated price
-                base_amount = random.uniform(50, 500)
-                manipulated_amount = base_amount * price_manipulation["manipulation_factor"]
-                
-                # Higher fraud score for transactions during manipulation
-                fraud_score = random.uniform(0.6, 0.9)
-                
-                transaction = {
-                    "merchant": merchant,
-                    "user": user,
-                    "amount": manipulated_amount,
-                    "base_amount": base_amount,
-                    "asset": asset,
-                    "price_manipulation": price_manipulation,
-                    "timestamp": price_manipulation["timestamp"] + timedelta(minutes=random.randint(0, manipulation_duration)),
-                    "fraud_score": fraud_score
-                }
-                
-                self.simulation_data["transactions"].append(transaction)
-                affected_transactions += 1
-                total_impact += abs(manipulated_amount - base_amount)
-                
-                if fraud_score > 0.7:
-                    flagged_transactions += 1
+            for asset, normal_price, factor, duration, event_iso in zip(
+                assets.tolist(), normal_prices.tolist(), factors.tolist(),
+                durations.tolist(), _iso_timestamps(event_times)
+            )
+        ]
+        
+        # Transactions affected by price manipulation, expanded from their events
+        affected_transactions = int(affected_counts.sum())
+        event_of_txn = np.repeat(np.arange(manipulation_events), affected_counts)
+        
+        # Transaction amounts affected by manipulated price, with a higher fraud
+        # score for transactions during manipulation
+        merchant_idx, user_idx, base_amounts, fraud_scores = self._draw_phase(
+            affected_transactions, merchant_count, user_count, (50, 500), (0.6, 0.9)
+        )
+        manipulated_amounts = base_amounts * factors[event_of_txn]
+        timestamps = event_times[event_of_txn] + 60 * self.rng.integers(0, durations[event_of_txn] + 1)
         
-        await asyncio.sleep(3)  # Longer simulation for oracle attacks
+        self._append_transactions(merchant_idx, user_idx, manipulated_amounts, fraud_scores,
+                                  timestamps, "oracle_manipulation")
+        total_impact = float(np.abs(manipulated_amounts - base_amounts).sum())
+        flagged_transactions = int((fraud_scores > 0.7).sum())
         
         return {
             "success": True,
@@ -336,94 +822,77 @@ class SpellSimulator:
             "detection_metrics": {
                 "manipulation_detection_rate": flagged_transactions / affected_transactions if affected_transactions > 0 else 0,
                 "average_price_deviation": sum(abs(pm["manipulation_factor"] - 1.0) for pm in price_manipulations) / len(price_manipulations) if price_manipulations else 0
-            }
+            } if analytics else {}
         }
     
-    async def _simulate_sybil_attack(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def _simulate_sybil_attack(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate Sybil attack with multiple fake accounts"""
         
+        analytics = parameters.get("analytics", True)
+        
         # Create fake accounts
-        fake_account_count = random.randint(20, 50)
+        fake_account_count = int(self.rng.integers(20, 51))
         fake_accounts = [f"SYBIL_{i:04d}" for i in range(fake_account_count)]
         
         # Target merchants for the attack
-        target_merchants = random.sample(list(self.simulation_data["merchants"].keys()), min(3, len(self.simulation_data["merchants"])))
+        merchant_keys = list(self.simulation_data["merchants"].keys())
+        target_idx = self.rng.choice(len(merchant_keys), min(3, len(merchant_keys)), replace=False)
+        target_merchants = [merchant_keys[m] for m in target_idx.tolist()]
         
-        affected_transactions = 0
-        flagged_transactions = 0
-        total_impact = 0.0
+        now_s = int(time.time())
         
-        # Phase 1: Account creation and initial activity
-        for fake_account in fake_accounts:
-            self.simulation_data["users"][fake_account] = {
-                "transaction_count": 0,
-                "total_spent": 0,
-                "risk_profile": "high",
-                "account_age": random.randint(1, 7),  # Very new accounts
-                "is_sybil": True
-            }
-            
-            # Each fake account makes transactions with target merchants
-            transactions_per_account = random.randint(5, 15)
-            
-            for _ in range(transactions_per_account):
-                merchant = random.choice(target_merchants)
-                amount = random.uniform(10, 200)
-                
-                # Sybil accounts have coordinated behavior patterns
-                fraud_score = random.uniform(0.5, 0.8)
-                
-                transaction = {
-                    "merchant": merchant,
-                    "user": fake_account,
-                    "amount": amount,
-                    "timestamp": datetime.utcnow() - timedelta(hours=random.randint(0, 48)),
-                    "fraud_score": fraud_score,
-                    "attack_type": "sybil",
-                    "coordination_pattern": True
-                }
-                
-                self.simulation_data["transactions"].append(transaction)
-                affected_transactions += 1
-                total_impact += amount
-                
-                if fraud_score > 0.6:
-                    flagged_transactions += 1
-        
-        # Phase 2: Coordinated attack
-        coordination_events = random.randint(3, 8)
-        
-        for event in range(coordination_events):
-            # Select subset of Sybil accounts for coordinated action
-            coordinating_accounts = random.sample(fake_accounts, random.randint(5, 15))
-            target_merchant = random.choice(target_merchants)
-            
-            # Coordinated transactions within short time window
-            event_timestamp = datetime.utcnow() - timedelta(minutes=random.randint(0, 240))
-            
-            for account in coordinating_accounts:
-                amount = random.uniform(100, 500)
-                fraud_score = random.uniform(0.7, 0.95)  # High fraud score for coordinated actions
-                
-                transaction = {
-                    "merchant": target_merchant,
-                    "user": account,
-                    "amount": amount,
-                    "timestamp": event_timestamp + timedelta(seconds=random.randint(0, 300)),  # Within 5-minute window
-                    "fraud_score": fraud_score,
-                    "attack_type": "sybil_coordination",
-                    "coordination_event": event
-                }
-                
-                self.simulation_data["transactions"].append(transaction)
-                affected_transactions += 1
-                total_impact += amount
-                flagged_transactions += 1
+        fake_idx = self.simulation_data["users"].upsert(
+            fake_accounts,
+            transaction_count=0,
+            total_spent=0,
+            risk_profile=RISK_PROFILES.index("high"),
+            account_age=self.rng.integers(1, 8, fake_account_count),  # Very new accounts
+            is_sybil=True
+        )
+        
+        # Phase 1: Account creation and initial activity - each fake account
+        # makes 5-15 transactions with target merchants
+        transactions_per_account = self.rng.integers(5, 16, fake_account_count)
+        n = int(transactions_per_account.sum())
+        amounts = self.rng.uniform(10, 200, n)
+        
+        # Sybil accounts have coordinated behavior patterns
+        fraud_scores = self.rng.uniform(0.5, 0.8, n)
+        self._append_transactions(
+            target_idx[self.rng.integers(0, target_idx.size, n)],
+            np.repeat(fake_idx, transactions_per_account),
+            amounts, fraud_scores,
+            now_s - 3600 * self.rng.integers(0, 49, n),
+            "sybil"
+        )
+        affected_transactions = n
+        total_impact = float(amounts.sum())
+        flagged_transactions = int((fraud_scores > 0.6).sum())
+        
+        # Phase 2: Coordinated attack - subsets of Sybil accounts hit one merchant
+        # each within a short time window
+        coordination_events = int(self.rng.integers(3, 9))
+        group_sizes = self.rng.integers(5, 16, coordination_events)
+        event_targets = target_idx[self.rng.integers(0, target_idx.size, coordination_events)]
+        event_times = now_s - 60 * self.rng.integers(0, 241, coordination_events)
         
-        await asyncio.sleep(4)  # Longer simulation for Sybil attacks
+        coordinating_idx = np.concatenate([
+            self.rng.choice(fake_idx, size, replace=False) for size in group_sizes.tolist()
+        ])
+        event_of_txn = np.repeat(np.arange(coordination_events), group_sizes)
+        n = coordinating_idx.size
+        amounts = self.rng.uniform(100, 500, n)
+        fraud_scores = self.rng.uniform(0.7, 0.95, n)  # High fraud score for coordinated actions
+        timestamps = event_times[event_of_txn] + self.rng.integers(0, 301, n)  # Within 5-minute window
+        
+        self._append_transactions(event_targets[event_of_txn], coordinating_idx, amounts, fraud_scores,
+                                  timestamps, "sybil_coordination")
+        affected_transactions += n
+        total_impact += float(amounts.sum())
+        flagged_transactions += n
         
         # Analyze coordination patterns
-        coordination_analysis = self._analyze_sybil_coordination(fake_accounts)
+        coordination_analysis = self._analyze_sybil_coordination(fake_idx) if analytics else {}
         
         return {
             "success": True,
@@ -439,86 +908,81 @@ class SpellSimulator:
                 "sybil_detection_rate": flagged_transactions / affected_transactions if affected_transactions > 0 else 0,
                 "account_clustering_score": random.uniform(0.7, 0.95),
                 "behavioral_similarity": random.uniform(0.8, 0.98)
-            }
+            } if analytics else {}
         }
     
-    async def _simulate_flash_loan_attack(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def _simulate_flash_loan_attack(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate flash loan attack"""
         
-        affected_transactions = 0
-        flagged_transactions = 0
-        total_impact = 0.0
+        analytics = parameters.get("analytics", True)
         
-        # Flash loan events
-        flash_loan_events = random.randint(3, 8)
-        attack_events = []
+        merchant_keys = list(self.simulation_data["merchants"].keys())
+        now_s = int(time.time())
         
-        for event_id in range(flash_loan_events):
-            # Flash loan parameters
-            loan_amount = random.uniform(100000, 1000000)  # Large loan amounts
-            exploit_merchant = random.choice(list(self.simulation_data["merchants"].keys()))
-            attacker_id = f"FLASHLOAN_ATTACKER_{event_id}"
-            
-            # Event timeline
-            event_start = datetime.utcnow() - timedelta(minutes=random.randint(0, 120))
-            
-            # Step 1: Take flash loan
-            flash_loan_txn = {
-                "type": "flash_loan_borrow",
-                "amount": loan_amount,
-                "user": attacker_id,
-                "timestamp": event_start,
-                "fraud_score": 0.95,  # Very high fraud score
-                "loan_duration_seconds": random.randint(10, 300)
-            }
-            
-            # Step 2: Exploit vulnerability
-            exploit_transactions = random.randint(5, 15)
-            exploit_profit = 0
-            
-            for _ in range(exploit_transactions):
-                exploit_amount = random.uniform(1000, 10000)
-                exploit_profit += exploit_amount * random.uniform(0.05, 0.15)  # 5-15% profit per transaction
-                
-                exploit_txn = {
-                    "type": "exploit_transaction",
-                    "merchant": exploit_merchant,
-                    "user": attacker_id,
-                    "amount": exploit_amount,
-                    "timestamp": event_start + timedelta(seconds=random.randint(10, 200)),
-                    "fraud_score": random.uniform(0.85, 0.98),
-                    "flash_loan_event": event_id
-                }
-                
-                self.simulation_data["transactions"].append(exploit_txn)
-                affected_transactions += 1
-                flagged_transactions += 1
-                total_impact += exploit_amount
-            
-            # Step 3: Repay flash loan with profit
-            repay_txn = {
-                "type": "flash_loan_repay",
-                "amount": loan_amount,
-                "profit": exploit_profit,
-                "user": attacker_id,
-                "timestamp": event_start + timedelta(seconds=random.randint(200, 300)),
-                "fraud_score": 0.9
-            }
-            
-            attack_event = {
+        # Flash loan events; every per-event draw is made up front, times as integer seconds
+        flash_loan_events = int(self.rng.integers(3, 9))
+        loan_amounts = self.rng.uniform(100000, 1000000, flash_loan_events)  # Large loan amounts
+        exploit_merchant_idx = self.rng.integers(0, len(merchant_keys), flash_loan_events)
+        event_starts = now_s - 60 * self.rng.integers(0, 121, flash_loan_events)
+        loan_durations = self.rng.integers(10, 301, flash_loan_events)
+        repay_offsets = self.rng.integers(200, 301, flash_loan_events)
+        exploit_counts = self.rng.integers(5, 16, flash_loan_events)
+        
+        # Step 2: Exploit vulnerability - every event's exploit transactions in one batch
+        affected_transactions = int(exploit_counts.sum())
+        event_of_txn = np.repeat(np.arange(flash_loan_events), exploit_counts)
+        exploit_amounts = self.rng.uniform(1000, 10000, affected_transactions)
+        # 5-15% profit per transaction
+        exploit_profits = np.bincount(
+            event_of_txn,
+            weights=exploit_amounts * self.rng.uniform(0.05, 0.15, affected_transactions),
+            minlength=flash_loan_events
+        )
+        timestamps = event_starts[event_of_txn] + self.rng.integers(10, 201, affected_transactions)
+        fraud_scores = self.rng.uniform(0.85, 0.98, affected_transactions)
+        
+        # Attackers are outside the user table
+        self._append_transactions(exploit_merchant_idx[event_of_txn], NO_USER, exploit_amounts, fraud_scores,
+                                  timestamps, "exploit_transaction")
+        flagged_transactions = affected_transactions
+        total_impact = float(exploit_amounts.sum())
+        
+        attack_events = [
+            {
                 "event_id": event_id,
                 "loan_amount": loan_amount,
                 "exploit_profit": exploit_profit,
-                "exploit_merchant": exploit_merchant,
-                "transaction_count": exploit_transactions,
-                "duration_seconds": (repay_txn["timestamp"] - event_start).total_seconds(),
+                "exploit_merchant": merchant_keys[merchant],
+                "transaction_count": count,
+                "duration_seconds": float(repay_offset),
                 "profitability": exploit_profit / loan_amount,
-                "timeline": [flash_loan_txn, repay_txn]
+                "timeline": [
+                    # Step 1: Take flash loan
+                    {
+                        "type": "flash_loan_borrow",
+                        "amount": loan_amount,
+                        "user": f"FLASHLOAN_ATTACKER_{event_id}",
+                        "timestamp": start_iso,
+                        "fraud_score": 0.95,  # Very high fraud score
+                        "loan_duration_seconds": loan_duration
+                    },
+                    # Step 3: Repay flash loan with profit
+                    {
+                        "type": "flash_loan_repay",
+                        "amount": loan_amount,
+                        "profit": exploit_profit,
+                        "user": f"FLASHLOAN_ATTACKER_{event_id}",
+                        "timestamp": repay_iso,
+                        "fraud_score": 0.9
+                    }
+                ]
             }
-            
-            attack_events.append(attack_event)
-        
-        await asyncio.sleep(1)  # Quick simulation for flash loans
+            for event_id, (loan_amount, exploit_profit, merchant, count, loan_duration, repay_offset,
+                           start_iso, repay_iso)
+            in enumerate(zip(loan_amounts.tolist(), exploit_profits.tolist(), exploit_merchant_idx.tolist(),
+                             exploit_counts.tolist(), loan_durations.tolist(), repay_offsets.tolist(),
+                             _iso_timestamps(event_starts), _iso_timestamps(event_starts + repay_offsets)))
+        ]
         
         return {
             "success": True,
@@ -528,115 +992,91 @@ class SpellSimulator:
             "total_impact": round(total_impact, 2),
             "flash_loan_events": flash_loan_events,
             "attack_events": attack_events,
-            "total_profit": sum(event["exploit_profit"] for event in attack_events),
-            "average_profitability": sum(event["profitability"] for event in attack_events) / len(attack_events) if attack_events else 0,
+            "total_profit": float(exploit_profits.sum()),
+            "average_profitability": float((exploit_profits / loan_amounts).mean()),
             "detection_metrics": {
                 "flash_loan_detection_rate": 1.0,  # Should be 100% detectable
-                "average_attack_duration": sum(event["duration_seconds"] for event in attack_events) / len(attack_events) if attack_events else 0
-            }
+                "average_attack_duration": float(repay_offsets.mean())
+            } if analytics else {}
         }
     
-    async def _simulate_merchant_collusion(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def _simulate_merchant_collusion(self, context: SpellContext, parameters: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
         """Simulate merchant collusion network"""
         
-        # Create collusion network
-        colluding_merchants = random.sample(list(self.simulation_data["merchants"].keys()), min(5, len(self.simulation_data["merchants"])))
+        analytics = parameters.get("analytics", True)
         
-        affected_transactions = 0
-        flagged_transactions = 0
-        total_impact = 0.0
+        # Create collusion network
+        merchant_keys = list(self.simulation_data["merchants"].keys())
+        colluding_idx = self.rng.choice(len(merchant_keys), min(5, len(merchant_keys)), replace=False)
+        colluding_merchants = [merchant_keys[m] for m in colluding_idx.tolist()]
         
         # Create shared customers for collusion
         shared_customers = [f"SHARED_CUSTOMER_{i:03d}" for i in range(20)]
         
-        for customer in shared_customers:
-            self.simulation_data["users"][customer] = {
-                "transaction_count": 0,
-                "total_spent": 0,
-                "risk_profile": "medium",
-                "account_age": random.randint(30, 365),
-                "is_colluding": True
-            }
+        customer_idx = self.simulation_data["users"].upsert(
+            shared_customers,
+            transaction_count=0,
+            total_spent=0,
+            risk_profile=RISK_PROFILES.index("medium"),
+            account_age=self.rng.integers(30, 366, len(shared_customers)),
+            is_colluding=True
+        )
         
-        # Pattern 1: Round-robin transactions
-        round_robin_rounds = random.randint(5, 10)
-        
-        for round_num in range(round_robin_rounds):
-            for i, merchant in enumerate(colluding_merchants):
-                customer = shared_customers[i % len(shared_customers)]
-                amount = random.uniform(200, 800)
-                
-                # Collusion patterns have moderate fraud scores
-                fraud_score = random.uniform(0.4, 0.7)
-                
-                transaction = {
-                    "merchant": merchant,
-                    "user": customer,
-                    "amount": amount,
-                    "timestamp": datetime.utcnow() - timedelta(hours=random.randint(0, 168)),  # Within past week
-                    "fraud_score": fraud_score,
-                    "pattern": "round_robin",
-                    "round": round_num
-                }
-                
-                self.simulation_data["transactions"].append(transaction)
-                affected_transactions += 1
-                total_impact += amount
-                
-                if fraud_score > 0.6:
-                    flagged_transactions += 1
-        
-        # Pattern 2: Circular money flow
-        circular_flows = random.randint(3, 6)
-        
-        for flow_id in range(circular_flows):
-            flow_amount = random.uniform(1000, 5000)
-            
-            # Money flows in a circle through merchants
-            for i in range(len(colluding_merchants)):
-                from_merchant = colluding_merchants[i]
-                to_merchant = colluding_merchants[(i + 1) % len(colluding_merchants)]
-                
-                # Use intermediary customer
-                intermediary = random.choice(shared_customers)
-                
-                # Transaction from merchant A to customer
-                txn1 = {
-                    "merchant": from_merchant,
-                    "user": intermediary,
-                    "amount": flow_amount,
-                    "timestamp": datetime.utcnow() - timedelta(hours=random.randint(0, 24)),
-                    "fraud_score": random.uniform(0.5, 0.8),
-                    "pattern": "circular_flow",
-                    "flow_id": flow_id,
-                    "step": "withdraw"
-                }
-                
-                # Transaction from customer to merchant B
-                txn2 = {
-                    "merchant": to_merchant,
-                    "user": intermediary,
-                    "amount": flow_amount * 0.95,  # 5% fee
-                    "timestamp": txn1["timestamp"] + timedelta(minutes=random.randint(5, 60)),
-                    "fraud_score": random.uniform(0.6, 0.9),
-                    "pattern": "circular_flow",
-                    "flow_id": flow_id,
-                    "step": "deposit"
-                }
-                
-                self.simulation_data["transactions"].extend([txn1, txn2])
-                affected_transactions += 2
-                total_impact += flow_amount
-                
-                if txn1["fraud_score"] > 0.6:
-                    flagged_transactions += 1
-                if txn2["fraud_score"] > 0.6:
-                    flagged_transactions += 1
-        
-        await asyncio.sleep(5)  # Longer simulation for collusion networks
+        n_merchants = len(colluding_merchants)
+        now_s = int(time.time())
+        
+        # Pattern 1: Round-robin transactions - every round, merchant i trades
+        # with customer i (mod the customer count)
+        round_robin_rounds = int(self.rng.integers(5, 11))
+        n = round_robin_rounds * n_merchants
+        amounts = self.rng.uniform(200, 800, n)
+        
+        # Collusion patterns have moderate fraud scores
+        fraud_scores = self.rng.uniform(0.4, 0.7, n)
+        self._append_transactions(
+            np.tile(colluding_idx, round_robin_rounds),
+            np.tile(customer_idx[np.arange(n_merchants) % customer_idx.size], round_robin_rounds),
+            amounts, fraud_scores,
+            now_s - 3600 * self.rng.integers(0, 169, n),  # Within past week
+            "round_robin"
+        )
+        affected_transactions = n
+        total_impact = float(amounts.sum())
+        flagged_transactions = int((fraud_scores > 0.6).sum())
+        
+        # Pattern 2: Circular money flow - in every flow, merchant i pays a random
+        # intermediary customer who pays merchant i + 1, closing the circle
+        circular_flows = int(self.rng.integers(3, 7))
+        flow_amounts = np.repeat(self.rng.uniform(1000, 5000, circular_flows), n_merchants)
+        n = flow_amounts.size
+        from_idx = np.tile(colluding_idx, circular_flows)
+        to_idx = np.tile(np.roll(colluding_idx, -1), circular_flows)
+        intermediaries = customer_idx[self.rng.integers(0, customer_idx.size, n)]
+        
+        # Both legs are drawn together: the first n rows are merchant A -> customer,
+        # the last n customer -> merchant B (5% fee, 5-60 minutes later)
+        withdraw_times = now_s - 3600 * self.rng.integers(0, 25, n)
+        fraud_scores = np.concatenate([self.rng.uniform(0.5, 0.8, n), self.rng.uniform(0.6, 0.9, n)])
+        self._append_transactions(
+            np.concatenate([from_idx, to_idx]),
+            np.tile(intermediaries, 2),
+            np.concatenate([flow_amounts, flow_amounts * 0.95]),
+            fraud_scores,
+            np.concatenate([withdraw_times, withdraw_times + 60 * self.rng.integers(5, 61, n)]),
+            "circular_flow"
+        )
+        
+        affected_transactions += 2 * n
+        total_impact += float(flow_amounts.sum())
+        flagged_transactions += int((fraud_scores > 0.6).sum())
         
         # Analyze collusion network
-        network_analysis = self._analyze_collusion_network(colluding_merchants, shared_customers)
+        if analytics == "summary":
+            network_analysis = self._collusion_counts(colluding_merchants, shared_customers).to_dict(include_clustering=False)
+        elif analytics:
+            network_analysis = self._collusion_counts(colluding_merchants, shared_customers).to_dict()
+        else:
+            network_analysis = {}
         
         return {
             "success": True,
@@ -651,73 +1091,82 @@ class SpellSimulator:
             "detection_metrics": {
                 "collusion_detection_rate": flagged_transactions / affected_transactions if affected_transactions > 0 else 0,
                 "network_density": network_analysis.get("density", 0),
-                "clustering_coefficient": network_analysis.get("clustering", 0)
-            }
+                "clustering_coefficient": network_analysis.get("clustering")  # None when skipped in summary mode
+            } if analytics else {}
         }
     
-    def _analyze_sybil_coordination(self, fake_accounts: List[str]) -> Dict[str, Any]:
+    def _append_transactions(self, merchant_idx, user_idx, amounts, fraud_scores, timestamps_s, phase: str):
+        """Append a batch of transactions to the store (see TransactionStore.append)"""
+        self.simulation_data["transactions"].append(merchant_idx, user_idx, amounts, fraud_scores,
+                                                    timestamps_s, phase)
+    
+    def _draw_phase(self, n: int, merchant_count: int, user_count: int,
+                    amount_range: tuple, score_range: tuple) -> tuple:
+        """
+        Draw n transactions with uniform merchants, users, amounts and fraud scores
+        
+        Args:
+            n: Number of transactions
+            merchant_count: Merchants are drawn from positions [0, merchant_count)
+            user_count: Users are drawn from positions [0, user_count)
+            amount_range: (low, high) amount range
+            score_range: (low, high) fraud score range
+            
+        Returns:
+            Tuple of (merchant_idx, user_idx, amounts, fraud_scores) arrays
+        """
+        if n > 0 and (merchant_count <= 0 or user_count <= 0):
+            # _gen_phase would clamp every draw to position -1, i.e. the last row
+            raise ValueError(f"Cannot draw {n} transactions from {merchant_count} merchants "
+                             f"and {user_count} users")
+        
+        merchant_idx = np.empty(n, dtype=TRANSACTION_DTYPES["merchant_idx"])
+        user_idx = np.empty(n, dtype=TRANSACTION_DTYPES["user_idx"])
+        amounts = np.empty(n, dtype=TRANSACTION_DTYPES["amount"])
+        fraud_scores = np.empty(n, dtype=TRANSACTION_DTYPES["fraud_score"])
+        rand_u, rand_m, rand_amt, rand_score = self.rng.random((4, n))
+        
+        _gen_phase(n, float(amount_range[0]), float(amount_range[1]),
+                   float(score_range[0]), float(score_range[1]), merchant_count, user_count,
+                   merchant_idx, user_idx, amounts, fraud_scores,
+                   rand_u, rand_m, rand_amt, rand_score)
+        return merchant_idx, user_idx, amounts, fraud_scores
+    
+    def _analyze_sybil_coordination(self, fake_account_idx: np.ndarray) -> Dict[str, Any]:
         """Analyze coordination patterns in Sybil attack"""
+        txns = self.simulation_data["transactions"]
         
         # Get transactions from fake accounts
-        sybil_transactions = [
-            txn for txn in self.simulation_data["transactions"]
-            if txn["user"] in fake_accounts
-        ]
+        sybil_mask = np.isin(txns["user_idx"], fake_account_idx)
         
-        # Analyze timing patterns
-        timestamps = [txn["timestamp"] for txn in sybil_transactions]
-        if len(timestamps) > 1:
-            time_diffs = [(timestamps[i+1] - timestamps[i]).total_seconds() for i in range(len(timestamps)-1)]
-            avg_time_diff = sum(time_diffs) / len(time_diffs)
-        else:
-            avg_time_diff = 0
+        # Analyze timing patterns (gaps between consecutive transactions in time order)
+        timestamps = np.sort(txns["timestamp_s"][sybil_mask])
+        avg_time_diff = float(np.diff(timestamps).mean()) if timestamps.size > 1 else 0.0
         
         # Analyze amount patterns
-        amounts = [txn["amount"] for txn in sybil_transactions]
-        amount_variance = np.var(amounts) if amounts else 0
+        amounts = txns["amount"][sybil_mask]
+        amount_variance = amounts.var(dtype=np.float64) if amounts.size else 0.0
         
         return {
-            "total_sybil_transactions": len(sybil_transactions),
+            "total_sybil_transactions": int(sybil_mask.sum()),
             "average_time_between_transactions": avg_time_diff,
             "amount_variance": float(amount_variance),
             "coordination_score": random.uniform(0.7, 0.95),
             "behavioral_similarity": random.uniform(0.8, 0.98)
         }
     
-    def _analyze_collusion_network(self, merchants: List[str], customers: List[str]) -> Dict[str, Any]:
-        """Analyze collusion network structure"""
-        
-        # Create subgraph with colluding entities
-        collusion_graph = nx.Graph()
-        
-        for merchant in merchants:
-            collusion_graph.add_node(merchant, node_type="merchant")
+    def _collusion_counts(self, merchants: List[str], customers: List[str]) -> CollusionReport:
+        """Count the transactions between colluding merchants and shared customers"""
+        txns = self.simulation_data["transactions"]
+        merchant_pos = self.simulation_data["merchants"].positions(merchants)
+        customer_pos = self.simulation_data["users"].positions(customers)
         
-        for customer in customers:
-            collusion_graph.add_node(customer, node_type="customer")
-        
-        # Add edges based on transactions
-        collusion_transactions = [
-            txn for txn in self.simulation_data["transactions"]
-            if txn["merchant"] in merchants and txn["user"] in customers
-        ]
-        
-        for txn in collusion_transactions:
-            if collusion_graph.has_edge(txn["user"], txn["merchant"]):
-                collusion_graph[txn["user"]][txn["merchant"]]["weight"] += 1
-            else:
-                collusion_graph.add_edge(txn["user"], txn["merchant"], weight=1)
-        
-        # Calculate network metrics
-        density = nx.density(collusion_graph)
-        clustering = nx.average_clustering(collusion_graph)
-        
-        return {
-            "nodes": collusion_graph.number_of_nodes(),
-            "edges": collusion_graph.number_of_edges(),
-            "density": density,
-            "clustering": clustering,
-            "merchant_count": len(merchants),
-            "customer_count": len(customers),
-            "transaction_count": len(collusion_transactions)
-        }
\ No newline at end of file
+        # Counted per pair in one pass over the store's position columns
+        merchant_local = np.full(len(self.simulation_data["merchants"]), -1, dtype=np.int32)
+        merchant_local[merchant_pos] = np.arange(merchant_pos.size)
+        customer_local = np.full(len(self.simulation_data["users"]), -1, dtype=np.int32)
+        customer_local[customer_pos] = np.arange(customer_pos.size)
+        count_edges = _count_edges if NUMBA_AVAILABLE else _count_edges_grouped
+        weights = count_edges(txns["user_idx"], txns["merchant_idx"], customer_local, merchant_local,
+                              customer_pos.size, merchant_pos.size)
+        return CollusionReport(weights)
@@ -3,9 +3,10 @@ Full-Scale PaySim Training
 Demonstrates training on the maximum practical dataset size
 """
 
+import argparse
 import logging
 import time
-from paysim_integration import PaySimFraudDetector
+from paysim_integration import PaySimFraudDetector, STREAM_BATCH_SIZE
 
 # Configure logging
 logging.basicConfig(
@@ -14,20 +15,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def train_full_scale():
-    """Train PaySim model on large-scale data"""
+def train_full_scale(sample_size: int = 1_000_000):
+    """
+    Train PaySim model on large-scale data
+    
+    Args:
+        sample_size: Number of PaySim transactions to train on
+    """
     
     print("🚀 FULL-SCALE PAYSIM TRAINING")
     print("=" * 50)
-    print("Training fraud detection on 1 million transactions...")
+    print(f"Training fraud detection on {sample_size:,} transactions...")
     print("Expected time: 2-3 minutes")
     print("Expected accuracy: 99%+")
     print()
     
     start_time = time.time()
     
-    # Train on 1M transactions (maximum practical)
-    detector = PaySimFraudDetector(model_sample_size=1_000_000)
+    # Train on 1M transactions by default (maximum practical)
+    detector = PaySimFraudDetector(model_sample_size=sample_size)
     
     print("🎯 Starting training...")
     results = detector.train_models()
@@ -70,15 +76,78 @@ def train_full_scale():
     
     return detector
 
+def train_streaming_scale(batch_size: int = STREAM_BATCH_SIZE):
+    """
+    Train the streaming PaySim model on the full dataset in Parquet batches
+    
+    Args:
+        batch_size: Rows per batch; bounds peak memory instead of the dataset size
+    """
+    
+    print("🚀 STREAMING PAYSIM TRAINING")
+    print("=" * 50)
+    print(f"Training fraud detection on the full dataset in batches of {batch_size:,}...")
+    print()
+    
+    start_time = time.time()
+    
+    detector = PaySimFraudDetector()
+    results = detector.train_streaming(batch_size=batch_size)
+    
+    duration = time.time() - start_time
+    
+    print(f"\n✅ TRAINING COMPLETE!")
+    print(f"⏱️ Total time: {duration/60:.2f} minutes")
+    print(f"📦 Batches: {results['batches']:,} ({results['rows']:,} transactions)")
+    
+    # Test prediction
+    print(f"\n🧪 Testing prediction...")
+    from models.pydantic_schemas import TransactionCreate
+    
+    test_transaction = TransactionCreate(
+        amount=15000.0,  # Large amount
+        user_id="test_user_suspicious",
+        merchant_id="merchant_unknown",
+        merchant_name="Unknown Merchant",
+        category="transfer"  # High-risk type
+    )
+    
+    fraud_probability = float(detector.predict_fraud_streaming([test_transaction])[0])
+    
+    print(f"🎯 Test Transaction Results:")
+    print(f"   Amount: ${test_transaction.amount:,.2f}")
+    print(f"   Type: {test_transaction.category}")
+    print(f"   Fraud Probability: {fraud_probability:.1%}")
+    print(f"   Is Fraudulent: {'🚨 YES' if fraud_probability > 0.5 else '✅ NO'}")
+    
+    return detector
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a production-scale PaySim fraud detection model")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="Skip the confirmation prompt (for scripted / CI runs)")
+    parser.add_argument("--sample-size", type=int, default=1_000_000,
+                        help="Number of PaySim transactions to train on (default: 1,000,000)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Train the streaming model on the full dataset in Parquet batches")
+    parser.add_argument("--batch-size", type=int, default=STREAM_BATCH_SIZE,
+                        help=f"Rows per batch with --stream (default: {STREAM_BATCH_SIZE:,})")
+    args = parser.parse_args()
+    
     print("This will train a production-scale PaySim fraud detection model.")
-    print("The model will use 1,000,000 transactions from the PaySim dataset.")
+    if args.stream:
+        print(f"The model will stream the full PaySim dataset in batches of {args.batch_size:,}.")
+    else:
+        print(f"The model will use {args.sample_size:,} transactions from the PaySim dataset.")
     print()
     
-    response = input("Do you want to proceed with full-scale training? (y/n): ")
+    proceed = args.yes or input("Do you want to proceed with full-scale training? (y/n): ").lower() in ['y', 'yes']
     
-    if response.lower() in ['y', 'yes']:
-        detector = train_full_scale()
+    if proceed:
+        if args.stream:
+            detector = train_streaming_scale(args.batch_size)
+        else:
+            detector = train_full_scale(args.sample_size)
         print("\n🎉 Full-scale PaySim model is ready for production!")
     else:
         print("Training cancelled. You can run smaller tests with the existing integration.")
\ No newline at end of file
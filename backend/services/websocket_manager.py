@@ -1,27 +1,115 @@
 from fastapi import WebSocket, WebSocketDisconnect
-import json
 import asyncio
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set, Deque, Tuple
+from collections import deque
+from weakref import WeakSet
 from datetime import datetime
 import random
 
+import numpy as np
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Pools the demo alert simulator draws from
+_ALERT_TYPES = (
+    {
+        "severity": "critical",
+        "title": "Unusual spending pattern detected",
+        "reasons": ("High velocity transactions", "Unusual merchant category", "Off-hours activity")
+    },
+    {
+        "severity": "high",
+        "title": "Receipt-transaction mismatch",
+        "reasons": ("OCR discrepancy", "Amount mismatch", "Merchant name mismatch")
+    },
+    {
+        "severity": "high",
+        "title": "Merchant network anomaly",
+        "reasons": ("Suspicious merchant cluster", "High centrality score", "Collusion pattern")
+    },
+    {
+        "severity": "medium",
+        "title": "Voice stress indicators",
+        "reasons": ("Elevated stress markers", "Unusual speech patterns", "Authentication concerns")
+    },
+    {
+        "severity": "high",
+        "title": "Geographic anomaly",
+        "reasons": ("Impossible travel time", "High-risk location", "VPN usage detected")
+    }
+)
+
+_MERCHANTS = (
+    "QuickMart #247", "TechStore Online", "FuelStop #89", "Restaurant Plaza",
+    "Electronics Hub", "Fashion Outlet", "Coffee Express", "Auto Parts Direct",
+    "Grocery Central", "Sports Equipment Co"
+)
+
+_AMOUNTS = (
+    "$127.45", "$899.99", "$67.23", "$45.67", "$1,234.56", "$2,847.50",
+    "$89.45", "$299.99", "$156.78", "$3,456.78"
+)
+
+_LOCATIONS = ("New York, NY", "Los Angeles, CA", "Chicago, IL", "Miami, FL", "Online")
+
+# Alerts the simulator pregenerates at a time
+ALERT_BATCH_SIZE = 64
+
+# Most recent alerts kept in alert_queue; older ones are evicted
+ALERT_QUEUE_MAXLEN = 1024
+
+# Seconds a client gets to take a broadcast before it is dropped
+SEND_TIMEOUT_S = 1.0
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """
+    Serialize a WebSocket message with orjson
+    
+    Messages go out as text frames, which clients read as strings; a binary
+    frame would change the wire format under them, so the UTF-8 bytes are decoded.
+    """
+    return orjson.dumps(message).decode()
+
+# Encoded '{"type":<type>,"data":' opening of each broadcast envelope
+_ENVELOPE_PREFIXES = {
+    message_type: b'{"type":' + orjson.dumps(message_type) + b',"data":'
+    for message_type in ("fraud_alert", "metrics_update", "transaction_update", "spell_result",
+                         "system_notification")
+}
+
+def encode_envelope(message_type: str, data: Dict[str, Any]) -> str:
+    """
+    Serialize a {"type", "data", "timestamp"} broadcast envelope
+    
+    Same JSON as encode_message on the envelope dict, but the fixed opening
+    is precomputed per type and only data is run through the encoder.
+    """
+    timestamp = datetime.utcnow().isoformat()
+    return (_ENVELOPE_PREFIXES[message_type] + orjson.dumps(data)
+            + b',"timestamp":"' + timestamp.encode() + b'"}').decode()
+
 class WebSocketManager:
     """
     WebSocket manager for real-time fraud alerts and notifications
     """
     
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.alert_queue: List[Dict[str, Any]] = []
+        # Weak, so a socket whose endpoint exits without disconnect() is collected
+        # and drops out on its own rather than leaking with its buffers
+        self.active_connections: WeakSet[WebSocket] = WeakSet()
+        self.alert_queue: Deque[Dict[str, Any]] = deque(maxlen=ALERT_QUEUE_MAXLEN)
         self.is_running = False
+        self._rng = random.Random()
+        self._np_rng = np.random.default_rng()
+        self._pending_alerts: Deque[Dict[str, Any]] = deque()
+        self._broadcast_tasks: Set[asyncio.Task] = set()
         
     async def connect(self, websocket: WebSocket):
         """Accept and store WebSocket connection"""
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
         logger.info(f"✅ WebSocket connected. Total connections: {len(self.active_connections)}")
         
         # Send welcome message
@@ -33,14 +121,13 @@ class WebSocketManager:
     
     def disconnect(self, websocket: WebSocket):
         """Remove WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        self.active_connections.discard(websocket)
         logger.info(f"❌ WebSocket disconnected. Total connections: {len(self.active_connections)}")
     
     async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket):
         """Send message to specific WebSocket connection"""
         try:
-            await websocket.send_text(json.dumps(message))
+            await websocket.send_text(encode_message(message))
         except Exception as e:
             logger.error(f"❌ Failed to send personal message: {e}")
             self.disconnect(websocket)
@@ -51,73 +138,66 @@ class WebSocketManager:
             logger.info("📢 No active connections for alert broadcast")
             return
         
-        message = {
-            "type": "fraud_alert",
-            "data": alert_data,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        disconnected_connections = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-                logger.info(f"📢 Alert broadcasted to client: {alert_data.get('transaction_id', 'unknown')}")
-            except Exception as e:
-                logger.error(f"❌ Failed to send alert to client: {e}")
-                disconnected_connections.append(connection)
-        
-        # Remove disconnected connections
-        for connection in disconnected_connections:
-            self.disconnect(connection)
+        # Serialize once for every client (still sent as a text frame)
+        delivered, dropped = await self._send_to_all(encode_envelope("fraud_alert", alert_data),
+                                                     "❌ Failed to send alert")
+        logger.info("📢 Alert %s broadcasted to %d clients (%d dropped)",
+                    alert_data.get("transaction_id", "unknown"), delivered, dropped)
     
     async def broadcast_metrics_update(self, metrics: Dict[str, Any]):
         """Broadcast metrics update to all connected clients"""
-        message = {
-            "type": "metrics_update",
-            "data": metrics,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await self._broadcast_to_all(message)
+        await self._broadcast_to_all("metrics_update", metrics)
     
     async def broadcast_transaction_update(self, transaction: Dict[str, Any]):
         """Broadcast new transaction to all connected clients"""
-        message = {
-            "type": "transaction_update",
-            "data": transaction,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await self._broadcast_to_all(message)
+        await self._broadcast_to_all("transaction_update", transaction)
     
     async def broadcast_spell_result(self, spell_result: Dict[str, Any]):
         """Broadcast spell simulation result to all connected clients"""
-        message = {
-            "type": "spell_result",
-            "data": spell_result,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await self._broadcast_to_all(message)
+        await self._broadcast_to_all("spell_result", spell_result)
     
-    async def _broadcast_to_all(self, message: Dict[str, Any]):
-        """Internal method to broadcast message to all connections"""
+    async def _broadcast_to_all(self, message_type: str, data: Dict[str, Any]):
+        """Internal method to broadcast a message envelope to all connections"""
         if not self.active_connections:
             return
         
-        disconnected_connections = []
+        # Serialize once for every client (still sent as a text frame)
+        await self._send_to_all(encode_envelope(message_type, data), "❌ Failed to broadcast message")
+    
+    async def _send_to_all(self, payload: str, failure_message: str) -> Tuple[int, int]:
+        """
+        Send a serialized message to every connection concurrently, so a slow
+        client doesn't hold up the others
         
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"❌ Failed to broadcast message: {e}")
-                disconnected_connections.append(connection)
+        Each send gets SEND_TIMEOUT_S, so the broadcast (and its payload) is
+        released in bounded time however slow the slowest client is. Connections
+        whose send fails or times out are dropped afterwards, with one log line
+        for all of them.
         
-        # Remove disconnected connections
-        for connection in disconnected_connections:
-            self.disconnect(connection)
+        Args:
+            payload: JSON text to send
+            failure_message: Log prefix for failed sends
+            
+        Returns:
+            Tuple of (clients the message reached, connections dropped)
+        """
+        # Snapshot, so connects/disconnects during the sends don't shift the results
+        # (the list also keeps every connection alive until its send completes)
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(connection.send_text(payload), SEND_TIMEOUT_S) for connection in connections),
+            return_exceptions=True
+        )
+        
+        failures = [(connection, result) for connection, result in zip(connections, results)
+                    if isinstance(result, BaseException)]
+        if failures:
+            for connection, _ in failures:
+                self.active_connections.discard(connection)
+            logger.error("%s to %d clients (first error: %r). Total connections: %d",
+                         failure_message, len(failures), failures[0][1], len(self.active_connections))
+        
+        return len(connections) - len(failures), len(failures)
     
     async def start_alert_simulator(self):
         """Start background alert simulator for demo purposes"""
@@ -130,72 +210,68 @@ class WebSocketManager:
         while self.is_running:
             try:
                 # Wait between 30-120 seconds for next simulated alert
-                await asyncio.sleep(random.randint(30, 120))
+                await asyncio.sleep(self._rng.randint(30, 120))
                 
                 if self.active_connections:
-                    # Generate random alert
-                    alert = self._generate_random_alert()
-                    await self.broadcast_alert(alert)
+                    # Next pregenerated alert, refilling the batch when it runs out
+                    if not self._pending_alerts:
+                        self._pending_alerts.extend(self._generate_alert_batch(ALERT_BATCH_SIZE))
+                    # Broadcast in the background so the simulator's timer doesn't wait on it;
+                    # the task set holds a reference until it finishes
+                    task = asyncio.create_task(self.broadcast_alert(self._pending_alerts.popleft()))
+                    self._broadcast_tasks.add(task)
+                    task.add_done_callback(self._broadcast_tasks.discard)
                 
             except Exception as e:
                 logger.error(f"❌ Alert simulator error: {e}")
                 await asyncio.sleep(60)  # Wait before retrying
     
-    def _generate_random_alert(self) -> Dict[str, Any]:
-        """Generate random fraud alert for simulation"""
-        alert_types = [
-            {
-                "severity": "critical",
-                "title": "Unusual spending pattern detected",
-                "reasons": ["High velocity transactions", "Unusual merchant category", "Off-hours activity"]
-            },
-            {
-                "severity": "high", 
-                "title": "Receipt-transaction mismatch",
-                "reasons": ["OCR discrepancy", "Amount mismatch", "Merchant name mismatch"]
-            },
-            {
-                "severity": "high",
-                "title": "Merchant network anomaly",
-                "reasons": ["Suspicious merchant cluster", "High centrality score", "Collusion pattern"]
-            },
-            {
-                "severity": "medium",
-                "title": "Voice stress indicators",
-                "reasons": ["Elevated stress markers", "Unusual speech patterns", "Authentication concerns"]
-            },
-            {
-                "severity": "high",
-                "title": "Geographic anomaly",
-                "reasons": ["Impossible travel time", "High-risk location", "VPN usage detected"]
-            }
-        ]
+    def _generate_alert_batch(self, k: int) -> List[Dict[str, Any]]:
+        """
+        Generate k random fraud alerts with one vectorized draw per field
         
-        merchants = [
-            "QuickMart #247", "TechStore Online", "FuelStop #89", "Restaurant Plaza",
-            "Electronics Hub", "Fashion Outlet", "Coffee Express", "Auto Parts Direct",
-            "Grocery Central", "Sports Equipment Co"
-        ]
+        Args:
+            k: Number of alerts
+            
+        Returns:
+            List of fraud alert dicts ready to broadcast
+        """
+        rng = self._np_rng
         
-        amounts = [
-            "$127.45", "$899.99", "$67.23", "$45.67", "$1,234.56", "$2,847.50",
-            "$89.45", "$299.99", "$156.78", "$3,456.78"
-        ]
+        type_idx = rng.integers(0, len(_ALERT_TYPES), k)
+        reason_counts = np.array([len(t["reasons"]) for t in _ALERT_TYPES])[type_idx]
+        factor_counts = rng.integers(1, reason_counts + 1)
+        # Random order of each alert's reasons (argsort of noise), padded to the longest list
+        reason_order = np.argsort(rng.random((k, int(reason_counts.max()))), axis=1)
         
-        # Select random alert type
-        alert_type = random.choice(alert_types)
+        transaction_ids = rng.integers(10000, 100000, k)
+        merchant_idx = rng.integers(0, len(_MERCHANTS), k)
+        amount_idx = rng.integers(0, len(_AMOUNTS), k)
+        confidences = np.floor(rng.uniform(0.7, 0.98, k) * 100) / 100
+        minutes = rng.integers(1, 31, k)
+        location_idx = rng.integers(0, len(_LOCATIONS), k)
         
-        return {
-            "transaction_id": f"TXN-{random.randint(10000, 99999)}",
-            "severity": alert_type["severity"],
-            "title": alert_type["title"],
-            "merchant": random.choice(merchants),
-            "amount": random.choice(amounts),
-            "confidence": round(random.uniform(0.7, 0.98), 2),
-            "factors": random.sample(alert_type["reasons"], random.randint(1, len(alert_type["reasons"]))),
-            "time": f"{random.randint(1, 30)} min ago",
-            "location": random.choice(["New York, NY", "Los Angeles, CA", "Chicago, IL", "Miami, FL", "Online"])
-        }
+        alerts = []
+        for t, count, order, txn_id, m, a, confidence, minute, loc in zip(
+            type_idx.tolist(), factor_counts.tolist(), reason_order.tolist(), transaction_ids.tolist(),
+            merchant_idx.tolist(), amount_idx.tolist(), confidences.tolist(), minutes.tolist(),
+            location_idx.tolist()
+        ):
+            alert_type = _ALERT_TYPES[t]
+            reasons = alert_type["reasons"]
+            alerts.append({
+                "transaction_id": f"TXN-{txn_id}",
+                "severity": alert_type["severity"],
+                "title": alert_type["title"],
+                "merchant": _MERCHANTS[m],
+                "amount": _AMOUNTS[a],
+                "confidence": confidence,
+                "factors": [reasons[j] for j in order if j < len(reasons)][:count],
+                "time": f"{minute} min ago",
+                "location": _LOCATIONS[loc]
+            })
+        
+        return alerts
     
     def stop_alert_simulator(self):
         """Stop the alert simulator"""
@@ -204,13 +280,7 @@ class WebSocketManager:
     
     async def send_system_notification(self, notification: Dict[str, Any]):
         """Send system notification to all connected clients"""
-        message = {
-            "type": "system_notification",
-            "data": notification,
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-        await self._broadcast_to_all(message)
+        await self._broadcast_to_all("system_notification", notification)
     
     def get_connection_stats(self) -> Dict[str, Any]:
         """Get WebSocket connection statistics"""
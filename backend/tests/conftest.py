@@ -0,0 +1,12 @@
+"""
+Test configuration: put the backend package and the services directory on sys.path
+(the service modules use both package-style and script-style imports)
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "services"))
@@ -0,0 +1,88 @@
+"""
+Feature kernels against the pandas feature engineering they replaced
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.paysim_loader import PAYSIM_DTYPES, PaySimLoader
+
+BALANCE_COLUMNS = ['amount', 'oldbalanceOrg', 'newbalanceOrig', 'oldbalanceDest', 'newbalanceDest']
+
+def _consistent_frame(n: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """PaySim-shaped rows whose balances move by exactly the amount, into the tens of millions"""
+    rng = np.random.default_rng(seed)
+    amount = rng.uniform(1, 1e6, n).round(2)
+    old_orig = (amount + rng.uniform(0, 5e7, n)).round(2)
+    old_dest = rng.uniform(0, 5e7, n).round(2)
+    frame = pd.DataFrame({
+        'step': rng.integers(1, 744, n),
+        'type': rng.choice(['PAYMENT', 'TRANSFER', 'CASH_OUT', 'CASH_IN', 'DEBIT'], n),
+        'amount': amount,
+        'nameOrig': [f"C{i}" for i in range(n)],
+        'oldbalanceOrg': old_orig,
+        'newbalanceOrig': (old_orig - amount).round(2),
+        'nameDest': [f"M{i % 100}" for i in range(n)],
+        'oldbalanceDest': old_dest,
+        'newbalanceDest': (old_dest + amount).round(2),
+        'isFraud': 0,
+        'isFlaggedFraud': 0
+    })
+    # Parse the way read_paysim does
+    return frame.astype(PAYSIM_DTYPES)
+
+def _baseline_balance_features(df: pd.DataFrame) -> pd.DataFrame:
+    """The pandas balance features feature engineering used before the kernels"""
+    out = pd.DataFrame(index=df.index)
+    out['balance_change_orig'] = df['newbalanceOrig'] - df['oldbalanceOrg']
+    out['balance_change_dest'] = df['newbalanceDest'] - df['oldbalanceDest']
+    out['amount_to_balance_orig'] = df['amount'] / (df['oldbalanceOrg'] + 1)
+    out['amount_to_balance_dest'] = df['amount'] / (df['oldbalanceDest'] + 1)
+    out['balance_inconsistent_orig'] = (abs(out['balance_change_orig'] + df['amount']) > 0.01).astype(int)
+    out['balance_inconsistent_dest'] = (abs(out['balance_change_dest'] - df['amount']) > 0.01).astype(int)
+    out['zero_balance_orig'] = (df['oldbalanceOrg'] == 0).astype(int)
+    out['zero_balance_dest'] = (df['oldbalanceDest'] == 0).astype(int)
+    out['zero_newbalance_orig'] = (df['newbalanceOrig'] == 0).astype(int)
+    out['zero_newbalance_dest'] = (df['newbalanceDest'] == 0).astype(int)
+    return out
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    return _consistent_frame()
+
+@pytest.fixture(scope="module")
+def features(frame: pd.DataFrame) -> pd.DataFrame:
+    loader = PaySimLoader()
+    loader.load_dataset(df=frame, balance_fraud=False)
+    return loader.engineer_features()
+
+def test_balance_columns_load_as_float64():
+    assert all(PAYSIM_DTYPES[column] == 'float64' for column in BALANCE_COLUMNS)
+
+@pytest.mark.parametrize("column", ['balance_inconsistent_orig', 'balance_inconsistent_dest'])
+def test_consistent_rows_match_baseline(frame: pd.DataFrame, features: pd.DataFrame, column: str):
+    baseline = _baseline_balance_features(frame)
+    assert baseline[column].sum() == 0
+    np.testing.assert_array_equal(features[column].to_numpy(), baseline[column].to_numpy())
+
+def test_balance_features_match_baseline(frame: pd.DataFrame, features: pd.DataFrame):
+    baseline = _baseline_balance_features(frame)
+    for column in baseline.columns:
+        np.testing.assert_allclose(features[column].to_numpy(dtype=np.float64),
+                                   baseline[column].to_numpy(dtype=np.float64),
+                                   rtol=1e-6, err_msg=column)
+
+def test_amount_features_match_baseline(frame: pd.DataFrame, features: pd.DataFrame):
+    amount = frame['amount']
+    np.testing.assert_allclose(features['amount_log'], np.log1p(amount), rtol=1e-6)
+    np.testing.assert_allclose(features['amount_sqrt'], np.sqrt(amount), rtol=1e-6)
+    np.testing.assert_allclose(features['amount_squared'], amount ** 2, rtol=1e-6)
+
+def test_inconsistent_rows_are_flagged(frame: pd.DataFrame):
+    tampered = frame.copy()
+    tampered.loc[:9, 'newbalanceOrig'] += 1.0
+    loader = PaySimLoader()
+    loader.load_dataset(df=tampered, balance_fraud=False)
+    flags = loader.engineer_features()['balance_inconsistent_orig'].to_numpy()
+    assert flags[:10].all() and not flags[10:].any()
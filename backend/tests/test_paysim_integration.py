@@ -0,0 +1,75 @@
+"""
+Batch fraud prediction against per-transaction prediction
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("xgboost")
+pytest.importorskip("shap")
+
+from models.pydantic_schemas import TransactionCreate
+from services.paysim_integration import PaySimFraudDetector
+
+TYPES = ["PAYMENT", "TRANSFER", "CASH_OUT", "CASH_IN", "DEBIT"]
+CATEGORIES = ["payment", "transfer", "withdrawal", "deposit", "debit", None]
+
+def _paysim_frame(n: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """Small synthetic PaySim frame; emptied-out transfers and cash-outs are the fraud"""
+    rng = np.random.default_rng(seed)
+    types = rng.choice(TYPES, n)
+    amount = np.round(rng.lognormal(6, 1.5, n), 2)
+    old_orig = np.round(amount * rng.uniform(0.5, 3.0, n), 2)
+    is_fraud = (np.isin(types, ["TRANSFER", "CASH_OUT"]) & (rng.random(n) < 0.3)).astype(np.int8)
+    new_orig = np.where(is_fraud == 1, 0.0, np.maximum(old_orig - amount, 0.0))
+    old_dest = np.round(rng.uniform(0, 5000, n), 2)
+    return pd.DataFrame({
+        "step": rng.integers(1, 744, n).astype(np.int32),
+        "type": pd.Categorical(types),
+        "amount": amount,
+        "nameOrig": [f"C{i}" for i in range(n)],
+        "oldbalanceOrg": old_orig,
+        "newbalanceOrig": new_orig,
+        "nameDest": [f"M{i}" for i in rng.integers(0, 300, n)],
+        "oldbalanceDest": old_dest,
+        "newbalanceDest": old_dest + amount,
+        "isFraud": is_fraud,
+        "isFlaggedFraud": np.zeros(n, dtype=np.int8)
+    })
+
+@pytest.fixture(scope="module")
+def detector(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("paysim"))  # the model directory is relative
+        detector = PaySimFraudDetector.from_dataframe(
+            _paysim_frame(), n_jobs=1,
+            enabled_models=frozenset({"isolation_forest", "logistic_regression", "random_forest"})
+        )
+        detector.train_models(save_models=False)
+    return detector
+
+def test_predict_fraud_batch_matches_per_transaction(detector):
+    rng = np.random.default_rng(1)
+    transactions = [
+        TransactionCreate(user_id=f"user_{i}", amount=float(np.round(rng.lognormal(6, 1.5), 2)),
+                          merchant_id=f"merchant_{i % 7}", merchant_name=f"Merchant {i % 7}",
+                          category=CATEGORIES[i % len(CATEGORIES)])
+        for i in range(12)
+    ]
+    
+    batch = detector.predict_fraud_batch(transactions)
+    
+    assert len(batch) == len(transactions)
+    for transaction, batched in zip(transactions, batch):
+        single = detector.predict_fraud(transaction)
+        assert batched["fraud_probability"] == pytest.approx(single["fraud_probability"])
+        assert batched["is_fraudulent"] == single["is_fraudulent"]
+        assert batched["confidence"] == pytest.approx(single["confidence"])
+        assert batched["transaction_data"] == single["transaction_data"]
+        assert batched["individual_models"].keys() == single["individual_models"].keys()
+        for model_name, score in single["individual_models"].items():
+            assert batched["individual_models"][model_name] == pytest.approx(score)
+
+def test_predict_fraud_batch_of_nothing(detector):
+    assert detector.predict_fraud_batch([]) == []
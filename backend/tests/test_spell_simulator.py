@@ -0,0 +1,151 @@
+"""
+Spell results over the columnar stores, and collusion network metrics against networkx
+"""
+
+import asyncio
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from models.pydantic_schemas import SpellContext, SpellType
+from services.spell_simulator import (IGRAPH_AVAILABLE, NO_USER, CollusionReport, SpellSimulator,
+                                      _count_edges, _count_edges_grouped, _sparse_clustering)
+
+# (customers x merchants) transaction counts of a tiny bipartite subgraph;
+# customer 2 never traded with a colluding merchant
+WEIGHTS = np.array([
+    [3, 1, 0],
+    [0, 2, 0],
+    [0, 0, 0],
+    [1, 1, 4]
+], dtype=np.int32)
+
+# Spells whose total_impact is the sum of the amounts they record
+IMPACT_IS_AMOUNT_SUM = {SpellType.RUG_PULL, SpellType.SYBIL_ATTACK, SpellType.FLASH_LOAN_ATTACK}
+
+def _execute(simulator: SpellSimulator, spell_type: SpellType, parameters=None):
+    async def run():
+        try:
+            return await simulator.execute_spell(spell_type, SpellContext(), parameters or {})
+        finally:
+            await simulator.close()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("spell_type", list(SpellType))
+def test_spell_result_matches_recorded_transactions(spell_type):
+    simulator = SpellSimulator()
+    store = simulator.simulation_data["transactions"]
+    before = len(store)
+    
+    result = _execute(simulator, spell_type)
+    
+    assert result["success"], result.get("error")
+    json.dumps(result)  # plain Python types only, no NumPy scalars or arrays
+    assert result["affected_transactions"] == len(store) - before
+    
+    amounts = store["amount"][before:]
+    if spell_type in IMPACT_IS_AMOUNT_SUM:
+        assert result["total_impact"] == pytest.approx(float(amounts.sum(dtype=np.float64)), abs=0.01)
+    
+    # Recorded positions point at rows of the entity tables
+    merchant_idx = store["merchant_idx"][before:]
+    user_idx = store["user_idx"][before:]
+    assert 0 <= merchant_idx.min() and merchant_idx.max() < len(simulator.simulation_data["merchants"])
+    assert NO_USER <= user_idx.min() and user_idx.max() < len(simulator.simulation_data["users"])
+    assert store[before]["amount"] == pytest.approx(float(amounts[0]))
+
+def test_execute_many_returns_results_in_spec_order():
+    spell_types = [SpellType.FLASH_LOAN_ATTACK, SpellType.RUG_PULL, SpellType.SYBIL_ATTACK]
+    
+    async def run():
+        simulator = SpellSimulator()
+        try:
+            return await simulator.execute_many([(t, SpellContext(), {"analytics": False}) for t in spell_types])
+        finally:
+            await simulator.close()
+            assert simulator._pool is None
+    
+    results = asyncio.run(run())
+    
+    assert [result["spell_type"] for result in results] == [t.value for t in spell_types]
+    assert all(result["success"] and result["affected_transactions"] > 0 for result in results)
+    json.dumps(results)
+
+def test_draw_phase_rejects_an_empty_entity_range():
+    simulator = SpellSimulator()
+    
+    with pytest.raises(ValueError):
+        simulator._draw_phase(5, 0, 10, (10, 100), (0.1, 0.3))
+    with pytest.raises(ValueError):
+        simulator._draw_phase(5, 10, 0, (10, 100), (0.1, 0.3))
+    
+    merchant_idx, user_idx, amounts, fraud_scores = simulator._draw_phase(0, 0, 0, (10, 100), (0.1, 0.3))
+    assert merchant_idx.size == user_idx.size == amounts.size == fraud_scores.size == 0
+
+def _networkx_graph(weights: np.ndarray) -> nx.Graph:
+    n_customers, n_merchants = weights.shape
+    graph = nx.Graph()
+    graph.add_nodes_from(range(n_customers + n_merchants))
+    rows, cols = np.nonzero(weights)
+    graph.add_edges_from(zip(rows.tolist(), (cols + n_customers).tolist()))
+    return graph
+
+def test_collusion_report_matches_networkx():
+    report = CollusionReport(WEIGHTS)
+    graph = _networkx_graph(WEIGHTS)
+    
+    assert report.nodes == graph.number_of_nodes()
+    assert report.edges == graph.number_of_edges()
+    assert report.density == pytest.approx(nx.density(graph))
+    assert report.clustering == pytest.approx(nx.average_clustering(graph))
+    assert report.transaction_count == int(WEIGHTS.sum())
+    assert (report.customer_count, report.merchant_count) == WEIGHTS.shape
+
+def test_collusion_report_summary_leaves_out_clustering():
+    report = CollusionReport(WEIGHTS)
+    summary = report.to_dict(include_clustering=False)
+    
+    assert "clustering" not in summary
+    assert "clustering" not in report.__dict__  # not computed either
+    assert report.to_dict() == {**summary, "clustering": report.clustering}
+
+def test_summary_collusion_spell_reports_no_clustering():
+    result = _execute(SpellSimulator(), SpellType.MERCHANT_COLLUSION, {"analytics": "summary"})
+    
+    assert result["success"]
+    assert "clustering" not in result["network_analysis"]
+    assert result["detection_metrics"]["clustering_coefficient"] is None
+
+def test_sparse_clustering_matches_networkx_without_igraph():
+    # The fallback path, checked directly whether or not igraph is installed
+    assert _sparse_clustering(WEIGHTS) == pytest.approx(nx.average_clustering(_networkx_graph(WEIGHTS)))
+
+@pytest.mark.skipif(not IGRAPH_AVAILABLE, reason="python-igraph not installed")
+def test_igraph_clustering_matches_sparse():
+    from services.spell_simulator import _igraph_clustering
+    assert _igraph_clustering(WEIGHTS) == pytest.approx(_sparse_clustering(WEIGHTS))
+
+@pytest.mark.parametrize("count_edges", [_count_edges, _count_edges_grouped])
+def test_edge_counts_match_naive_count(count_edges):
+    rng = np.random.default_rng(0)
+    n_users, n_merchants, n_txns = 12, 6, 500
+    txn_user_idx = rng.integers(-1, n_users, n_txns).astype(np.int32)  # -1: no user
+    txn_merchant_idx = rng.integers(0, n_merchants, n_txns).astype(np.int32)
+    
+    customers = np.array([1, 4, 7, 9])
+    merchants = np.array([0, 2, 5])
+    customer_local = np.full(n_users, -1, dtype=np.int32)
+    customer_local[customers] = np.arange(customers.size)
+    merchant_local = np.full(n_merchants, -1, dtype=np.int32)
+    merchant_local[merchants] = np.arange(merchants.size)
+    
+    expected = np.zeros((customers.size, merchants.size), dtype=np.int64)
+    for u, m in zip(txn_user_idx.tolist(), txn_merchant_idx.tolist()):
+        if u >= 0 and customer_local[u] >= 0 and merchant_local[m] >= 0:
+            expected[customer_local[u], merchant_local[m]] += 1
+    
+    counts = count_edges(txn_user_idx, txn_merchant_idx, customer_local, merchant_local,
+                         customers.size, merchants.size)
+    np.testing.assert_array_equal(counts, expected)
@@ -0,0 +1,63 @@
+"""
+WebSocket message encoding and broadcast fan-out
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from services.websocket_manager import (_ENVELOPE_PREFIXES, SEND_TIMEOUT_S, WebSocketManager,
+                                        encode_envelope, encode_message)
+
+DATA = {
+    "transaction_id": "TXN-12345",
+    "amount": "$1,234.56",
+    "confidence": 0.93,
+    "factors": ["Impossible travel time", "VPN usage detected"],
+    "merchant": "Café \"Quote\" ☃",
+    "nested": {"ok": True, "missing": None}
+}
+
+@pytest.mark.parametrize("message_type", sorted(_ENVELOPE_PREFIXES))
+def test_encode_envelope_round_trips(message_type: str):
+    decoded = json.loads(encode_envelope(message_type, DATA))
+    assert list(decoded) == ["type", "data", "timestamp"]
+    assert decoded["type"] == message_type
+    assert decoded["data"] == DATA
+
+def test_encode_envelope_matches_encode_message():
+    encoded = encode_envelope("fraud_alert", DATA)
+    assert encoded == encode_message(json.loads(encoded))
+
+def test_encode_message_is_text():
+    encoded = encode_message({"type": "connection_established", "data": DATA})
+    assert isinstance(encoded, str)
+    assert json.loads(encoded)["data"] == DATA
+
+class _FakeSocket:
+    """Records text frames; optionally fails or stalls on send"""
+    
+    def __init__(self, fail: bool = False, stall: bool = False):
+        self.fail = fail
+        self.stall = stall
+        self.sent = []
+    
+    async def send_text(self, payload: str):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        if self.stall:
+            await asyncio.sleep(SEND_TIMEOUT_S * 10)
+        self.sent.append(payload)
+
+def test_broadcast_drops_failed_and_slow_clients():
+    manager = WebSocketManager()
+    healthy, broken, slow = _FakeSocket(), _FakeSocket(fail=True), _FakeSocket(stall=True)
+    for socket in (healthy, broken, slow):
+        manager.active_connections.add(socket)
+    
+    delivered, dropped = asyncio.run(manager._send_to_all(encode_message(DATA), "send failed"))
+    
+    assert (delivered, dropped) == (1, 2)
+    assert json.loads(healthy.sent[0]) == DATA
+    assert set(manager.active_connections) == {healthy}